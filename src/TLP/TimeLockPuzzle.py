@@ -1,12 +1,25 @@
-from random import randint, seed as seedRND, getrandbits  # Random int from start to end
-from dataclasses import dataclass, astuple  # Data encapsulation
-from libnum import generate_prime  # Generate primes
+from random import Random, randint, getrandbits  # Random int from start to end, private generator of the seeded values
+from functools import reduce  # Product of the small primes
+from math import gcd  # Small prime factors
+from dataclasses import dataclass, astuple, replace  # Data encapsulation
+from typing import Iterable, Iterator, Tuple, Union  # Type hint
+from libnum import generate_prime, invmod, prime_test, primes  # Generate and test primes, modular inverse
 from sys import byteorder  # Little / Big endian
 
 from Crypto.Cipher import Salsa20  # Symmetric encryption
 
+from .backends import get_backend
+from .proof import prove, verify
+from .pool import ModulusPool, get_pool
+
 SALSA20_NONCE_LENGTH: int = 8
 
+STREAM_CHUNK: int = 1 << 16
+""" Amount of bytes read at once from a file-like payload """
+
+SMALL_PRIMES: int = reduce(lambda a, b: a * b, primes(1000))
+""" Product of the primes below 1000, candidates sharing a factor with it are skipped without the primality test """
+
 
 @dataclass(frozen=True)
 class TimeLockPuzzle:
@@ -26,10 +39,132 @@ class TimeLockPuzzle:
         return iter(astuple(self))
 
 
+@dataclass(frozen=True)
+class SolutionTLP:
+    """ The solution of a time-lock puzzle together with a proof that it is correct """
+    B: int
+    """ Result of T square operations of A """
+    PI: int
+    """ Proof of exponentiation of R """
+    R: int
+    """ Result of T - 1 square operations of A, the proof holds for it up to the sign, and B is its square """
+
+
+@dataclass(frozen=True)
+class PuzzleContext:
+    """ The puzzle context holds a composite modulus together with its trapdoor, so that many puzzles can be locked """
+    P: int
+    """ First prime factor of the modulus """
+    Q: int
+    """ Second prime factor of the modulus """
+    S: int
+    """ The amount of squaring operations per second """
+
+    @property
+    def N(self) -> int:
+        """ Composite modulus """
+        return self.P * self.Q
+
+    @staticmethod
+    def new(SEC: int, S: int, seed: bytes = None) -> 'PuzzleContext':
+        """
+        Generates a new composite modulus. If a modulus pool is running for SEC and no seed is given, the primes are
+        drawn from the pool.
+
+        :param SEC: the security parameter
+        :param S: the amount of squaring operations per second
+        :param seed: randomness seed value to create deterministic modulus
+
+        :return: the puzzle context
+        """
+        pool: ModulusPool = get_pool(SEC)
+        if pool and not seed:
+            P, Q = pool.draw()
+            return PuzzleContext(P, Q, S)
+
+        if seed:
+            P: int = seeded_prime(SEC // 2, seed + b'p')
+            Q: int = seeded_prime(SEC // 2, seed + b'q')
+            counter: int = 0
+            while Q == P:
+                counter += 1
+                Q = seeded_prime(SEC // 2, seed + b'q' + counter.to_bytes(4, byteorder='big'))
+        else:
+            P: int = generate_prime(SEC // 2)
+            Q: int = generate_prime(SEC // 2)
+            while Q == P:
+                Q = generate_prime(SEC // 2)
+
+        return PuzzleContext(P, Q, S)
+
+    def lock(self, M: bytes, T: int, seed: bytes = None) -> TimeLockPuzzle:
+        """
+        Locks the message in a new time-lock puzzle with a fresh base and key, the modulus is reused, so the cost is
+        one exponentiation using the trapdoor and the encryption
+
+        :param M: the secret message to encrypt
+        :param T: the amount of seconds to decrypt
+        :param seed: randomness seed value to create deterministic tlp
+
+        :return: the generated time-lock puzzle
+        """
+        timeLockPuzzle, salsa20Cipher = self._lock(T, seed)
+
+        return replace(timeLockPuzzle, C_M=timeLockPuzzle.C_M + salsa20Cipher.encrypt(M))
+
+    def lock_stream(self, M: Iterable, T: int, seed: bytes = None) -> (TimeLockPuzzle, Iterator):
+        """
+        Locks a message read chunk by chunk in a new time-lock puzzle, the puzzle only holds the nonce and the cipher
+        text is returned chunk by chunk as well, so the memory use does not depend on the message size
+
+        :param M: the secret message, a file-like object opened for binary reading or an iterable of bytes
+        :param T: the amount of seconds to decrypt
+        :param seed: randomness seed value to create deterministic tlp
+
+        :return: the generated time-lock puzzle and the iterator of the encrypted message chunks
+        """
+        timeLockPuzzle, salsa20Cipher = self._lock(T, seed)
+
+        return timeLockPuzzle, (salsa20Cipher.encrypt(chunk) for chunk in _chunks(M))
+
+    def _lock(self, T: int, seed: bytes = None) -> (TimeLockPuzzle, Salsa20.Salsa20Cipher):
+        """ Creates the time-lock puzzle without the encrypted message, and the cipher to encrypt it with """
+        N: int = self.N
+
+        # Get the number of squaring operations
+        O: int = T * self.S
+
+        # Get a Salsa20 key and initialize the Salsa20 cipher
+        K_bits: int = Salsa20.key_size[1] * 8
+        K: bytes = (Random(seed + b'k').getrandbits(K_bits) if seed else getrandbits(K_bits)).to_bytes(
+            Salsa20.key_size[1], byteorder=byteorder
+        )
+        K_lock: bytes = int.to_bytes(
+            int.from_bytes(K, byteorder=byteorder) % N, length=Salsa20.key_size[1], byteorder=byteorder
+        )
+        nonce_bits: int = SALSA20_NONCE_LENGTH * 8
+        nonce = (Random(seed + b'nonce').getrandbits(nonce_bits) if seed else getrandbits(nonce_bits)).to_bytes(
+            SALSA20_NONCE_LENGTH, byteorder=byteorder
+        )
+        salsa20Cipher: Salsa20.Salsa20Cipher = Salsa20.new(key=K_lock, nonce=nonce)
+
+        # Generate a random value, a ∈ (2, n)
+        A: int = Random(seed + b'a').randint(2, N + 1) if seed else randint(2, N + 1)
+
+        # Calculate the exponentiation using the trapdoor
+        B: int = trapdoor_pow(A, O, self.P, self.Q)
+
+        # Fuzzify the key by mixing it with the exponentiation
+        C_K: int = (int.from_bytes(K, byteorder) % N + B) % N
+
+        return TimeLockPuzzle(N, A, O, C_K, salsa20Cipher.nonce), salsa20Cipher
+
+
 def Gen(SEC: int, M: bytes, T: int, S: int, seed: bytes = None) -> TimeLockPuzzle:
     """
     Time-lock puzzle generation algorithm encrypts the message so that it can be obtained by solving for the key and
-    decrypting the encrypted message. Salsa20 symmetric encryption algorithm is used here.
+    decrypting the encrypted message. Salsa20 symmetric encryption algorithm is used here. If a modulus pool is running
+    for SEC and no seed is given, the primes are drawn from the pool.
 
     :param SEC: the security parameter
     :param M: the secret message to encrypt
@@ -39,81 +174,160 @@ def Gen(SEC: int, M: bytes, T: int, S: int, seed: bytes = None) -> TimeLockPuzzl
 
     :return: the generated time-lock puzzle
     """
-    def pow_mod(A: int, E: int, N: int) -> int:
-        """ Get (A^E) % N """
-        R = 1  # Result buffer
-        while E > 1:
-            if E & 1:
-                R = (R * A) % N
-            A = A ** 2 % N
-            E >>= 1
-        return (A * R) % N
-
-    # Get two random large prime numbers, deduce the composite modulus N and Φ(N)
-    if seed:
-        seedRND(seed + b'p')
-    P: int = generate_prime(SEC // 2)
-    if seed:
-        seedRND(seed + b'q')
-    Q: int = generate_prime(SEC // 2)
-
-    N: int = P * Q
-    phi_N: int = (P - 1) * (Q - 1)
-
-    # Get the number of squaring operations
-    O: int = T * S
-
-    # Get a Salsa20 key, initialize the Salsa20 cipher and encrypt the secret message
-    if seed:
-        seedRND(seed + b'k')
-    K: bytes = getrandbits(Salsa20.key_size[1] * 8).to_bytes(Salsa20.key_size[1], byteorder=byteorder)
-    K_lock: bytes = int.to_bytes(
-        int.from_bytes(K, byteorder=byteorder) % N, length=Salsa20.key_size[1], byteorder=byteorder
-    )
-    if seed:
-        seedRND(seed + b'nonce')
-    nonce = getrandbits(SALSA20_NONCE_LENGTH * 8).to_bytes(SALSA20_NONCE_LENGTH, byteorder=byteorder)
-    salsa20Cipher: Salsa20.Salsa20Cipher = Salsa20.new(key=K_lock, nonce=nonce)
-    C_M: bytes = salsa20Cipher.nonce + salsa20Cipher.encrypt(M)
-
-    # Generate a random value, a ∈ (2, n)
-    if seed:
-        seedRND(seed + b'a')
-    A: int = randint(2, N + 1)
-    if seed:
-        seedRND()
-
-    # Exponent calculation
-    E: int = (2**O) % phi_N
-
-    # Calculate the exponentiation
-    B: int = pow_mod(A, E, N)
-
-    # Fuzzify the key by mixing it with the exponentiation
-    C_K: int = (int.from_bytes(K, byteorder) % N + B) % N
-
-    return TimeLockPuzzle(N, A, O, C_K, C_M)
-
-
-def Sol(timeLockPuzzle: TimeLockPuzzle) -> bytes:
+    return PuzzleContext.new(SEC, S, seed).lock(M, T, seed)
+
+
+def GenStream(SEC: int, M: Iterable, T: int, S: int, seed: bytes = None) -> (TimeLockPuzzle, Iterator):
+    """
+    Time-lock puzzle generation algorithm for large messages, the message is encrypted chunk by chunk and the puzzle
+    holds only the nonce
+
+    :param SEC: the security parameter
+    :param M: the secret message, a file-like object opened for binary reading or an iterable of bytes
+    :param T: the amount of seconds to decrypt
+    :param S: the amount of squaring operations per second
+    :param seed: randomness seed value to create deterministic tlp
+
+    :return: the generated time-lock puzzle and the iterator of the encrypted message chunks
+    """
+    return PuzzleContext.new(SEC, S, seed).lock_stream(M, T, seed)
+
+
+def seeded_prime(bits: int, seed: bytes) -> int:
+    """
+    Generates a prime deterministically from the seed. The candidates are drawn from a private generator, so the
+    global one is never reseeded, other threads drawing from it do not change the prime and do not get values derived
+    from the seed. Only the witnesses of the primality test come from the global generator, they do not change which
+    candidate is the prime.
+
+    :param bits: size of the prime in bits
+    :param seed: randomness seed value
+
+    :return: the prime
+    """
+    rng: Random = Random(seed)
+    while True:
+        P: int = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+        if gcd(P, SMALL_PRIMES) == 1 and prime_test(P):
+            return P
+
+
+def trapdoor_pow(A: int, O: int, P: int, Q: int) -> int:
+    """
+    Calculates A^(2^O) mod PQ using the factorization of the modulus. The exponent 2^O is reduced modulo P - 1 and
+    Q - 1 by Euler's theorem, so it is never materialized, and the two half-size exponentiations are combined by the
+    Chinese remainder theorem. The cost stays the same no matter how large O is.
+
+    :param A: squaring base
+    :param O: the amount of squaring operations
+    :param P: first prime factor of the modulus
+    :param Q: second prime factor of the modulus
+
+    :return: the result of the O squaring operations of A
+    """
+    B_P: int = pow(A % P, pow(2, O, P - 1), P)
+    B_Q: int = pow(A % Q, pow(2, O, Q - 1), Q)
+
+    return B_Q + Q * ((B_P - B_Q) * invmod(Q, P) % P)
+
+
+def Sol(
+        timeLockPuzzle: TimeLockPuzzle, backend: str = None, proof: bool = False
+) -> Union[bytes, Tuple[bytes, SolutionTLP]]:
     """
     Time-lock puzzle solving algorithm performs the square operation a certain amount of time to obtain a key to decrypt
-    the secret message.
+    the secret message. Optionally, it creates a proof that lets anyone check the solution without solving the puzzle,
+    which takes about as long as the solving itself.
 
     :param timeLockPuzzle: the time-lock puzzle to solve
+    :param backend: name of the sequential squaring backend, the fastest available one is used if not given
+    :param proof: return the solution and its proof as well
 
-    :return: the original secret message
+    :return: the original secret message, or a tuple of the message and the solution if the proof is requested
+    """
+    N, A, T, _, _ = timeLockPuzzle
+    if not proof:
+        # Perform T square operations of A
+        return unlock(timeLockPuzzle, get_backend(backend)(A % N, T, N))
+
+    # Perform T - 1 square operations of A and prove them, the last square removes the sign the proof leaves open
+    R: int = get_backend(backend)(A % N, T - 1, N)
+    B: int = R * R % N
+
+    return unlock(timeLockPuzzle, B), SolutionTLP(B, prove(N, A % N, T - 1, R, backend), R)
+
+
+def VerifySolution(timeLockPuzzle: TimeLockPuzzle, solution: SolutionTLP) -> bool:
+    """
+    Checks that the solution is the result of the squaring operations of the time-lock puzzle using its proof
+
+    :param timeLockPuzzle: the solved time-lock puzzle
+    :param solution: the solution with its proof
+
+    :return: whether the solution is correct, if so, unlock(timeLockPuzzle, solution.B) gives the secret message
+    """
+    N, A, T, _, _ = timeLockPuzzle
+    if not (0 <= solution.B < N and 0 <= solution.R < N) or solution.B != solution.R * solution.R % N:
+        return False
+
+    return verify(N, A % N, T - 1, solution.R, solution.PI)
+
+
+def SolStream(timeLockPuzzle: TimeLockPuzzle, C: Iterable, backend: str = None) -> Iterator:
+    """
+    Time-lock puzzle solving algorithm for large messages, once the squaring operations are done, the encrypted message
+    is decrypted chunk by chunk
+
+    :param timeLockPuzzle: the time-lock puzzle to solve
+    :param C: the encrypted message, a file-like object opened for binary reading or an iterable of bytes
+    :param backend: name of the sequential squaring backend, the fastest available one is used if not given
+
+    :return: iterator of the original secret message chunks
     """
-    N, A, T, C_K, C_M = timeLockPuzzle
+    N, A, T, _, _ = timeLockPuzzle
     # Perform T square operations of A
-    B: int = A % N
-    for _ in range(T):
-        B = B**2 % N
+    B: int = get_backend(backend)(A % N, T, N)
+
+    return unlock_stream(timeLockPuzzle, B, C)
+
+
+def unlock(timeLockPuzzle: TimeLockPuzzle, B: int) -> bytes:
+    """
+    Uses the result of the squaring operations to obtain the key and decrypt the secret message
+
+    :param timeLockPuzzle: the time-lock puzzle to open
+    :param B: the result of T square operations of A
+
+    :return: the original secret message
+    """
+    return _cipher(timeLockPuzzle, B).decrypt(timeLockPuzzle.C_M[SALSA20_NONCE_LENGTH:])
+
+
+def unlock_stream(timeLockPuzzle: TimeLockPuzzle, B: int, C: Iterable) -> Iterator:
+    """
+    Uses the result of the squaring operations to obtain the key and decrypt the secret message chunk by chunk
+
+    :param timeLockPuzzle: the time-lock puzzle to open
+    :param B: the result of T square operations of A
+    :param C: the encrypted message, a file-like object opened for binary reading or an iterable of bytes
 
-    # Defuzzify the key by mixing it with the exponentiation
+    :return: iterator of the original secret message chunks
+    """
+    salsa20Cipher: Salsa20.Salsa20Cipher = _cipher(timeLockPuzzle, B)
+
+    return (salsa20Cipher.decrypt(chunk) for chunk in _chunks(C))
+
+
+def _cipher(timeLockPuzzle: TimeLockPuzzle, B: int) -> Salsa20.Salsa20Cipher:
+    """ Defuzzifies the key by mixing it with the exponentiation and initializes the Salsa20 cipher with it """
+    N, _, _, C_K, C_M = timeLockPuzzle
     K: bytes = int.to_bytes((C_K - B) % N, length=Salsa20.key_size[1], byteorder=byteorder)
 
-    # Decrypt the secret message and return it
-    N, C = (C_M[:SALSA20_NONCE_LENGTH], C_M[SALSA20_NONCE_LENGTH:])
+    return Salsa20.new(key=K, nonce=C_M[:SALSA20_NONCE_LENGTH])
+
 
-    return Salsa20.new(key=K, nonce=N).decrypt(C)
+def _chunks(M: Iterable) -> Iterator:
+    """ Reads a file-like object chunk by chunk, or iterates over an iterable of bytes """
+    if hasattr(M, 'read'):
+        return iter(lambda: M.read(STREAM_CHUNK), b'')
+    return iter(M)
@@ -1 +1,2 @@
-from src.TLP.TimeLockPuzzle import Gen as GenTLP, Sol as SolTLP, TimeLockPuzzle
+from src.TLP.TimeLockPuzzle import Gen as GenTLP, Sol as SolTLP, TimeLockPuzzle, PuzzleContext, SolutionTLP, \
+    VerifySolution
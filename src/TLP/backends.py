@@ -0,0 +1,93 @@
+from typing import Callable  # Type hint
+
+from libnum import invmod  # Modular inverse
+
+try:
+    from gmpy2 import mpz, powmod  # GMP integers
+except ImportError:
+    mpz, powmod = None, None
+
+CHUNK: int = 1 << 16
+""" The amount of squaring operations done by a single exponentiation call """
+
+
+def square_python(B: int, T: int, N: int) -> int:
+    """ Squares B T times modulo N in a pure Python loop """
+    for _ in range(T):
+        B = B**2 % N
+    return B
+
+
+def square_pow(B: int, T: int, N: int) -> int:
+    """ Squares B T times modulo N by raising it to 2^CHUNK with the built-in pow, chunk by chunk """
+    while T > 0:
+        k: int = min(T, CHUNK)
+        B = pow(B, 1 << k, N)
+        T -= k
+    return B
+
+
+def square_gmpy2(B: int, T: int, N: int) -> int:
+    """ Squares B T times modulo N using the GMP modular exponentiation, chunk by chunk """
+    B, N = mpz(B), mpz(N)
+    while T > 0:
+        k: int = min(T, CHUNK)
+        B = powmod(B, mpz(1) << k, N)
+        T -= k
+    return int(B)
+
+
+def square_montgomery(B: int, T: int, N: int) -> int:
+    """ Squares B T times modulo an odd N in the Montgomery form, the reductions are done by shifts and masks """
+    R_bits: int = N.bit_length()
+    R_mask: int = (1 << R_bits) - 1
+    N_inv: int = -invmod(N, 1 << R_bits) & R_mask
+
+    # Move B to the Montgomery form, square it and move it back
+    X: int = (B << R_bits) % N
+    for _ in range(T):
+        X = X * X
+        X = (X + ((X & R_mask) * N_inv & R_mask) * N) >> R_bits
+        if X >= N:
+            X -= N
+
+    return X * invmod(1 << R_bits, N) % N
+
+
+def power(A: int, E: int, N: int) -> int:
+    """ Computes A^E mod N, using GMP if it is available """
+    return int(powmod(A, E, N)) if powmod else pow(A, E, N)
+
+
+BACKENDS: {str: Callable} = {
+    'python': square_python,
+    'pow': square_pow,
+    'montgomery': square_montgomery,
+}
+""" Possible sequential squaring backends """
+if powmod:
+    BACKENDS['gmpy2'] = square_gmpy2
+
+PREFERENCE: [str] = ['gmpy2', 'pow', 'python', 'montgomery']
+""" Order in which the backend is chosen automatically """
+
+
+def default_backend() -> str:
+    """ Returns the name of the fastest backend available """
+    return next(backend for backend in PREFERENCE if backend in BACKENDS)
+
+
+def get_backend(name: str = None) -> Callable:
+    """
+    Returns the sequential squaring backend by its name, or the fastest one available if no name is given
+
+    :param name: name of the backend
+
+    :return: function squaring B T times modulo N
+    """
+    if name is None:
+        name = default_backend()
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise Exception(f"backend = {set(BACKENDS)}")
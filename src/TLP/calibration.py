@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field  # Data encapsulation
+from statistics import mean, stdev  # Confidence intervals
+from json import dump, load  # Profile from/to file
+from os import environ  # Profile location
+from os.path import exists  # Profile lookup
+from platform import node, processor  # Host description
+from time import perf_counter  # Elapsed time
+
+from libnum import generate_prime  # Generate primes
+
+from .backends import BACKENDS, default_backend
+
+PROFILE_PATH: str = environ.get('TLP_PROFILE', 'tlp_profile.json')
+""" Location of the machine profile, can be changed by the TLP_PROFILE environment variable """
+
+SEC_calibrate: [int] = [256, 512, 1024, 2048, 3072]
+""" Modulus sizes to calibrate for """
+
+S_DEFAULT: int = 100_000
+""" Number of squares per second, if the machine is not calibrated """
+
+T_95: [float] = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228]
+""" Two-sided 95 % Student's t quantiles for 1 up to 10 degrees of freedom """
+
+
+@dataclass
+class Profile:
+    """ Squaring speed of a machine per modulus size and backend """
+    host: str
+    """ Description of the measured machine """
+    rates: {str: {int: (float, float, float)}} = field(default_factory=dict)
+    """ Mean squaring operations per second and its 95 % confidence interval by the backend and the modulus size """
+
+    def squares_per_second(self, bits: int, backend: str = None) -> int:
+        """
+        Returns the measured mean squaring speed for the closest calibrated modulus size
+
+        :param bits: modulus size in bits
+        :param backend: name of the backend, the one used by default if not given
+
+        :return: squaring operations per second, or None if the backend has not been calibrated
+        """
+        rates: {int: (float, float, float)} = self.rates.get(backend or default_backend())
+        if not rates:
+            return None
+        closest: int = min(rates, key=lambda size: abs(size - bits))
+
+        return round(rates[closest][0])
+
+    def save(self, path: str = PROFILE_PATH) -> None:
+        """ Writes the profile to a JSON file """
+        with open(path, 'w') as file:
+            dump({
+                'host': self.host,
+                'rates': {name: {str(bits): rate for bits, rate in rates.items()} for name, rates in self.rates.items()}
+            }, file, indent=2)
+
+    @staticmethod
+    def load(path: str = PROFILE_PATH) -> 'Profile':
+        """ Reads the profile from a JSON file, returns None if there is no such file """
+        if not exists(path):
+            return None
+        with open(path) as file:
+            profile: {} = load(file)
+
+        return Profile(profile['host'], {
+            name: {int(bits): tuple(rate) for bits, rate in rates.items()} for name, rates in profile['rates'].items()
+        })
+
+
+def measure(bits: int, backend: str, rounds: int = 5, warmup: int = 1, duration: float = 0.2) -> (float, float, float):
+    """
+    Measures the squaring speed of a backend for a random modulus
+
+    :param bits: modulus size in bits
+    :param backend: name of the backend
+    :param rounds: number of measured rounds
+    :param warmup: number of rounds which are not measured
+    :param duration: approximate duration of a round in seconds
+
+    :return: mean squaring operations per second and its 95 % confidence interval
+    """
+    N: int = generate_prime(bits // 2) * generate_prime(bits // 2)
+    square = BACKENDS[backend]
+
+    def run(O: int) -> float:
+        """ Returns the squaring operations per second of a single round """
+        start: float = perf_counter()
+        square(3, O, N)
+        return O / (perf_counter() - start)
+
+    # Find the amount of squares that takes about the duration of a round, then warm up
+    O: int = 1_000
+    while O / run(O) < duration / 4:
+        O *= 4
+    O = max(round(run(O) * duration), 1)
+    for _ in range(warmup):
+        run(O)
+
+    results: [float] = [run(O) for _ in range(rounds)]
+    rate: float = mean(results)
+    if rounds < 2:
+        return rate, rate, rate
+    error: float = T_95[min(rounds - 1, len(T_95)) - 1] * stdev(results) / rounds ** 0.5
+
+    return rate, rate - error, rate + error
+
+
+def calibrate(sizes: [int] = None, backends: [str] = None, rounds: int = 5, warmup: int = 1) -> Profile:
+    """
+    Measures the squaring speed of this machine
+
+    :param sizes: modulus sizes in bits, SEC_calibrate if not given
+    :param backends: names of the backends, all the available ones if not given
+    :param rounds: number of measured rounds per modulus size and backend
+    :param warmup: number of rounds which are not measured
+
+    :return: the machine profile
+    """
+    profile: Profile = Profile(f'{node()} {processor()}'.strip())
+    for name in backends or BACKENDS.keys():
+        profile.rates[name] = {bits: measure(bits, name, rounds, warmup) for bits in sizes or SEC_calibrate}
+
+    return profile
+
+
+PROFILE: Profile = Profile.load()
+""" Profile of this machine loaded at startup, None if the machine is not calibrated """
+
+
+def squares_per_second(bits: int, default: int) -> int:
+    """ Returns the calibrated squaring speed of this machine for the default backend, or the default value """
+    speed: int = PROFILE.squares_per_second(bits) if PROFILE else None
+
+    return speed or default
+
+
+if __name__ == '__main__':
+    calibrated: Profile = calibrate()
+    calibrated.save()
+    for backend_name, backend_rates in calibrated.rates.items():
+        for size, (rate, low, high) in backend_rates.items():
+            print(f'{backend_name} {size} {round(rate)} ({round(low)}, {round(high)})')
@@ -0,0 +1,118 @@
+from concurrent.futures import Future, ProcessPoolExecutor  # Background workers
+from collections import deque  # Bounded queue
+from random import seed as seedRND  # Set randomness seed value
+from threading import Lock  # Thread safe counters
+
+from libnum import generate_prime  # Generate primes
+
+
+def reseed() -> None:
+    """ Reseeds the randomness of a worker, forked workers inherit the state of the parent, so they would repeat it """
+    seedRND()
+
+
+def generate_pair(SEC: int) -> (int, int):
+    """ Generates two distinct random primes whose product is a modulus of SEC bits """
+    P: int = generate_prime(SEC // 2)
+    Q: int = generate_prime(SEC // 2)
+    while Q == P:
+        Q = generate_prime(SEC // 2)
+
+    return P, Q
+
+
+class ModulusPool:
+    """ Keeps a bounded queue of pre-generated prime pairs which is topped up by a process pool in the background """
+
+    SEC: int
+    """ Modulus size in bits """
+    size: int
+    """ Maximum number of prepared pairs """
+    low: int
+    """ The queue is topped up once the number of prepared pairs drops to this value """
+    hits: int
+    """ Number of pairs taken from the queue """
+    misses: int
+    """ Number of pairs generated on demand, because the queue was empty """
+
+    def __init__(self, SEC: int, size: int = 8, low: int = 2, workers: int = None):
+        """
+        Start the pool and fill the queue
+
+        :param SEC: modulus size in bits
+        :param size: maximum number of prepared pairs
+        :param low: low watermark, once reached, the queue is topped up
+        :param workers: number of worker processes, defaults to the number of processors
+        """
+        if not 0 <= low < size:
+            raise Exception("0 <= low < size")
+
+        self.SEC, self.size, self.low = SEC, size, low
+        self.hits, self.misses = 0, 0
+
+        self._pairs: deque = deque(maxlen=size)
+        self._pending: int = 0
+        self._lock: Lock = Lock()
+        self._executor: ProcessPoolExecutor = ProcessPoolExecutor(workers, initializer=reseed)
+        self._top_up(force=True)
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def draw(self) -> (int, int):
+        """ Returns a prepared pair of primes, or generates one right away if there is none """
+        with self._lock:
+            pair: (int, int) = self._pairs.popleft() if self._pairs else None
+            if pair:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._top_up()
+
+        return pair or generate_pair(self.SEC)
+
+    def close(self) -> None:
+        """ Stops the background workers """
+        self._executor.shutdown(wait=False)
+
+    def _top_up(self, force: bool = False) -> None:
+        """ Requests new pairs from the workers once the low watermark is reached """
+        with self._lock:
+            if len(self._pairs) > self.low and not force:
+                return
+            missing: int = self.size - len(self._pairs) - self._pending
+            self._pending += max(missing, 0)
+
+        for _ in range(missing):
+            self._executor.submit(generate_pair, self.SEC).add_done_callback(self._store)
+
+    def _store(self, future: Future) -> None:
+        """ Puts a finished pair to the queue """
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled() and future.exception() is None:
+                self._pairs.append(future.result())
+
+
+POOLS: {int: ModulusPool} = {}
+""" Running pools by the modulus size """
+
+
+def start_pool(SEC: int, size: int = 8, low: int = 2, workers: int = None) -> ModulusPool:
+    """ Starts a modulus pool for the given modulus size, the time-lock puzzle generation draws from it from now on """
+    stop_pool(SEC)
+    POOLS[SEC] = ModulusPool(SEC, size, low, workers)
+
+    return POOLS[SEC]
+
+
+def stop_pool(SEC: int) -> None:
+    """ Stops the modulus pool for the given modulus size if there is one """
+    pool: ModulusPool = POOLS.pop(SEC, None)
+    if pool:
+        pool.close()
+
+
+def get_pool(SEC: int) -> ModulusPool:
+    """ Returns the running modulus pool for the given modulus size or None """
+    return POOLS.get(SEC)
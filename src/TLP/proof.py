@@ -0,0 +1,75 @@
+from hashlib import sha256  # Fiat-Shamir challenge
+
+from libnum import prime_test  # Primality check
+
+from .backends import CHUNK, get_backend, power
+
+CHALLENGE_BITS: int = 128
+""" Size of the challenge prime """
+
+
+def hash_prime(N: int, A: int, T: int, B: int) -> int:
+    """ Derives the challenge prime from the statement B = A^(2^T) mod N """
+    def encode(x: int) -> bytes:
+        """ Length prefixed big endian encoding of an integer """
+        length: int = (x.bit_length() + 7) // 8
+        return length.to_bytes(4, 'big') + x.to_bytes(length, 'big')
+
+    data: bytes = b''.join(encode(x) for x in (N, A, T, B))
+    L: int = int.from_bytes(sha256(data).digest()[:CHALLENGE_BITS // 8], 'big') | (1 << CHALLENGE_BITS - 1) | 1
+    while not prime_test(L):
+        L += 2
+
+    return L
+
+
+def normalize(x: int, N: int) -> int:
+    """ Represents x and -x by the same value, so the proof works in the group Z_N* / {±1} """
+    return min(x % N, -x % N)
+
+
+def prove(N: int, A: int, T: int, B: int, backend: str = None) -> int:
+    """
+    Computes the Wesolowski proof of exponentiation π = A^⌊2^T / L⌋ mod N, the quotient is obtained by a long division
+    chunk by chunk, so it is never materialized. The cost is about the same as of the T squaring operations, and a bit
+    more without GMP. The proof works in Z_N* / {±1}, as -1 is an element of known order in Z_N*, -B would have a
+    proof as well, so B is proven only up to its sign.
+
+    :param N: composite modulus
+    :param A: squaring base
+    :param T: squaring amount
+    :param B: A^(2^T) mod N
+    :param backend: name of the sequential squaring backend
+
+    :return: the proof
+    """
+    square = get_backend(backend)
+    L: int = hash_prime(N, A, T, normalize(B, N))
+
+    PI, R = 1, 1
+    while T > 0:
+        k: int = min(T, CHUNK)
+        Q, R = divmod(R << k, L)
+        PI = square(PI, k, N) * power(A, Q, N) % N
+        T -= k
+
+    return normalize(PI, N)
+
+
+def verify(N: int, A: int, T: int, B: int, PI: int) -> bool:
+    """
+    Checks the proof by testing whether π^L * A^(2^T mod L) = ±B mod N, the sign of B is not checked
+
+    :param N: composite modulus
+    :param A: squaring base
+    :param T: squaring amount
+    :param B: claimed A^(2^T) mod N
+    :param PI: the proof
+
+    :return: whether B or -B is the result of T squaring operations of A
+    """
+    if not (0 < PI < N and 0 <= B < N) or PI != normalize(PI, N):
+        return False
+    L: int = hash_prime(N, A, T, normalize(B, N))
+
+    return normalize(power(PI, L, N) * power(A, pow(2, T, L), N), N) == normalize(B, N)
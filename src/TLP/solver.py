@@ -0,0 +1,206 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed  # Parallel solving
+from asyncio import CancelledError, TimeoutError, get_running_loop, shield, wait  # Cooperative solving
+from dataclasses import dataclass, asdict  # Data encapsulation
+from typing import Callable, Generator  # Type hint
+from json import dump, load  # State from/to file
+from os import replace, remove  # Atomic file replacement
+from os.path import exists  # Checkpoint lookup
+from time import perf_counter, time  # Elapsed time, timestamp
+
+from .TimeLockPuzzle import TimeLockPuzzle, Sol, unlock
+from .backends import get_backend
+
+CHECKPOINT_EVERY: int = 1_000_000
+""" Default amount of squaring operations between two checkpoints """
+
+RATE_PROBE: int = 1_000
+""" Amount of squaring operations of the first chunk of a run with a deadline, it measures the squaring rate """
+
+
+@dataclass
+class SolverState:
+    """ Progress of solving a time-lock puzzle, after i square operations of A the value is B """
+    N: int
+    """ Composite modulus """
+    A: int
+    """ Squaring base """
+    T: int
+    """ Squaring amount """
+    i: int
+    """ Squaring operations done """
+    B: int
+    """ Current value """
+
+    @staticmethod
+    def start(timeLockPuzzle: TimeLockPuzzle) -> 'SolverState':
+        """ Returns the state before the first square operation """
+        N, A, T, _, _ = timeLockPuzzle
+        return SolverState(N, A, T, 0, A % N)
+
+    def matches(self, timeLockPuzzle: TimeLockPuzzle) -> bool:
+        """ Whether the state belongs to the given time-lock puzzle """
+        return (self.N, self.A, self.T) == (timeLockPuzzle.N, timeLockPuzzle.A, timeLockPuzzle.T)
+
+    def save(self, path: str) -> None:
+        """ Writes the state to a file, the file is replaced at once, so a crash can't leave it half written """
+        with open(path + '.tmp', 'w') as file:
+            dump({key: hex(value) for key, value in asdict(self).items()}, file)
+        replace(path + '.tmp', path)
+
+    @staticmethod
+    def load(path: str) -> 'SolverState':
+        """ Reads the state from a file """
+        with open(path) as file:
+            return SolverState(**{key: int(value, 16) for key, value in load(file).items()})
+
+
+class Solver:
+    """ Solves a time-lock puzzle in chunks, so that the progress can be checkpointed, reported and resumed """
+
+    timeLockPuzzle: TimeLockPuzzle
+    """ The time-lock puzzle to solve """
+    state: SolverState
+    """ Current progress """
+    rate: float
+    """ Squaring operations per second measured during the run """
+
+    def __init__(
+            self,
+            timeLockPuzzle: TimeLockPuzzle,
+            state: SolverState = None,
+            checkpoint: str = None,
+            every: int = CHECKPOINT_EVERY,
+            progress: Callable = None,
+            backend: str = None
+    ):
+        """
+        Prepare the solver, the progress is resumed from the given state or from the checkpoint file if it exists
+
+        :param timeLockPuzzle: the time-lock puzzle to solve
+        :param state: progress to resume from
+        :param checkpoint: path of the checkpoint file
+        :param every: amount of squaring operations between two checkpoints and progress reports
+        :param progress: called with the solver after every chunk
+        :param backend: name of the sequential squaring backend
+        """
+        if state is None and checkpoint and exists(checkpoint):
+            state = SolverState.load(checkpoint)
+        if state is not None and not state.matches(timeLockPuzzle):
+            raise Exception("The state belongs to another time-lock puzzle")
+
+        self.timeLockPuzzle = timeLockPuzzle
+        self.state = state or SolverState.start(timeLockPuzzle)
+        self.rate = 0.0
+
+        self._checkpoint: str = checkpoint
+        self._every: int = every
+        self._progress: Callable = progress
+        self._square: Callable = get_backend(backend)
+
+    @property
+    def done(self) -> bool:
+        """ Whether all the square operations are done """
+        return self.state.i >= self.state.T
+
+    @property
+    def eta(self) -> float:
+        """ Estimated amount of seconds left, based on the measured rate """
+        return (self.state.T - self.state.i) / self.rate if self.rate else float('inf')
+
+    def step(self, k: int) -> None:
+        """ Performs at most k of the remaining square operations and measures the rate """
+        k = min(k, self.state.T - self.state.i)
+        start: float = perf_counter()
+        B: int = self._square(self.state.B, k, self.state.N)
+        self.state.B, self.state.i = B, self.state.i + k
+        elapsed: float = perf_counter() - start
+        if elapsed > 0:
+            self.rate = k / elapsed
+
+    def _chunk_done(self) -> None:
+        """ Checkpoints and reports after a chunk """
+        if self._checkpoint:
+            self.state.save(self._checkpoint)
+        if self._progress:
+            self._progress(self)
+
+    def _finish(self) -> bytes:
+        """ Removes the checkpoint and decrypts the secret message """
+        if self._checkpoint and exists(self._checkpoint):
+            remove(self._checkpoint)
+
+        return unlock(self.timeLockPuzzle, self.state.B)
+
+    def run(self) -> bytes:
+        """
+        Performs the remaining square operations chunk by chunk, checkpoints and reports after each chunk
+
+        :return: the original secret message
+        """
+        while not self.done:
+            self.step(self._every)
+            self._chunk_done()
+
+        return self._finish()
+
+    async def run_async(self, deadline: float = None, executor: ThreadPoolExecutor = None) -> bytes:
+        """
+        Performs the remaining square operations chunk by chunk in the executor, so the event loop is not blocked. If
+        the solving is cancelled or the deadline passes, the chunk in progress is finished and the state keeps the
+        progress, so a new solver can resume from it.
+
+        :param deadline: Unix timestamp by which the puzzle has to be solved, TimeoutError is raised otherwise, it is
+            checked between the chunks, the first chunk only measures the rate and the others are shortened to what
+            fits before the deadline, so it is overshot only by as much as the rate changes
+        :param executor: thread executor to run the chunks in, the default one of the event loop if not given, the
+            chunks advance this solver, so they can not run in another process
+
+        :return: the original secret message
+        """
+        if executor is not None and not isinstance(executor, ThreadPoolExecutor):
+            raise Exception("The solver can only run in a thread executor")
+
+        while not self.done:
+            k: int = self._every
+            if deadline is not None:
+                left: float = deadline - time()
+                if left <= 0:
+                    raise TimeoutError()
+                k = max(min(k, int(self.rate * left)), 1) if self.rate else min(k, RATE_PROBE)
+
+            chunk = get_running_loop().run_in_executor(executor, self.step, k)
+            try:
+                await shield(chunk)
+            except CancelledError:
+                await wait({chunk})
+                self._chunk_done()
+                raise
+            self._chunk_done()
+
+        return self._finish()
+
+
+def solve_many(timeLockPuzzles: [TimeLockPuzzle], workers: int = None, backend: str = None) -> Generator:
+    """
+    Solves independent time-lock puzzles in parallel, each one by a single worker process
+
+    :param timeLockPuzzles: the time-lock puzzles to solve
+    :param workers: number of worker processes, defaults to the number of processors
+    :param backend: name of the sequential squaring backend
+
+    :return: generator of the puzzle position and its secret message pairs in the order they are solved, if it is
+        closed before the end, the waiting puzzles are cancelled and the workers solving the others are terminated
+    """
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(workers)
+    futures: {} = {executor.submit(Sol, tlp, backend): i for i, tlp in enumerate(timeLockPuzzles)}
+    try:
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        # The shutdown does not wait for the running puzzles, so their workers are stopped
+        processes: [] = list((executor._processes or {}).values()) if not all(f.done() for f in futures) else []
+        executor.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
@@ -1,5 +1,9 @@
 from pytest import mark
 from os import urandom
+from random import randint
+from importlib import import_module
+
+from libnum import generate_prime
 
 from src.TLP.TimeLockPuzzle import *
 
@@ -41,3 +45,54 @@ def test_tlp_deterministic(SEC):
     timeLockPuzzle2: TimeLockPuzzle = Gen(SEC, M_in, T, S, seed)
 
     assert timeLockPuzzle1 == timeLockPuzzle2
+
+
+@mark.parametrize("SEC", DATA)
+def test_tlp_trapdoor(SEC):
+    """ Exponentiation with the trapdoor gives the same result as the sequential squaring """
+    P, Q = generate_prime(SEC // 2), generate_prime(SEC // 2)
+    while P == Q:
+        Q = generate_prime(SEC // 2)
+    A: int = randint(2, P * Q - 1)
+
+    for O in [0, 1, 2, 100, 1000]:
+        assert trapdoor_pow(A, O, P, Q) == pow(A, 2**O, P * Q)
+
+
+def test_tlp_long_lock():
+    """ TLP generation does not depend on the locking time, a week long puzzle is generated right away """
+    timeLockPuzzle: TimeLockPuzzle = Gen(2048, M_in, 7 * 24 * 3600, 100_000)
+
+    assert timeLockPuzzle.T == 7 * 24 * 3600 * 100_000
+
+
+@mark.parametrize("SEC", DATA)
+def test_tlp_context(SEC):
+    """ Puzzles locked under one context share the modulus, but not the base, and they can be solved """
+    ctx: PuzzleContext = PuzzleContext.new(SEC, S)
+    timeLockPuzzles: [TimeLockPuzzle] = [ctx.lock(M_in, T) for _ in range(5)]
+
+    assert len({timeLockPuzzle.N for timeLockPuzzle in timeLockPuzzles}) == 1
+    assert len({timeLockPuzzle.A for timeLockPuzzle in timeLockPuzzles}) == 5
+    assert all(Sol(timeLockPuzzle) == M_in for timeLockPuzzle in timeLockPuzzles)
+
+
+@mark.parametrize("SEC", DATA)
+def test_tlp_context_deterministic(SEC):
+    """ TLP generation is the same as locking with a context built from the same seed """
+    seed: bytes = urandom(32)
+
+    assert Gen(SEC, M_in, T, S, seed) == PuzzleContext.new(SEC, S, seed).lock(M_in, T, seed)
+
+
+def test_tlp_context_distinct_primes(monkeypatch):
+    """ A seed whose two primes coincide derives another second prime, so the modulus is not a square """
+    seed: bytes = urandom(32)
+    monkeypatch.setattr(
+        import_module('src.TLP.TimeLockPuzzle'), 'seeded_prime',
+        lambda bits, s: seeded_prime(bits, seed + b'p' if s == seed + b'q' else s)
+    )
+
+    ctx: PuzzleContext = PuzzleContext.new(64, S, seed)
+    assert ctx.P == seeded_prime(32, seed + b'p') != ctx.Q
+    assert ctx.Q == PuzzleContext.new(64, S, seed).Q
@@ -0,0 +1,38 @@
+from pytest import mark
+from random import randint
+
+from libnum import generate_prime
+
+from src.TLP.backends import *
+from src.TLP.TimeLockPuzzle import Gen, Sol, TimeLockPuzzle
+
+
+SEC: [int] = [32, 512, 1024]
+""" Modulus sizes """
+T: [int] = [0, 1, 2, 1000, CHUNK + 1]
+""" Squaring amounts """
+
+
+@mark.parametrize("SEC", SEC)
+@mark.parametrize("name", BACKENDS.keys())
+def test_backend_same(SEC, name):
+    """ Every backend gives the same result as the pure Python loop """
+    N: int = generate_prime(SEC // 2) * generate_prime(SEC // 2)
+    B: int = randint(2, N - 1)
+
+    for t in T:
+        assert BACKENDS[name](B, t, N) == square_python(B, t, N)
+
+
+@mark.parametrize("name", BACKENDS.keys())
+def test_backend_sol(name):
+    """ Time-lock puzzle can be solved with every backend """
+    timeLockPuzzle: TimeLockPuzzle = Gen(512, b'Hello', 1, 1000)
+
+    assert Sol(timeLockPuzzle, name) == b'Hello'
+
+
+def test_backend_auto():
+    """ The fastest available backend is chosen when no name is given """
+    assert get_backend() in BACKENDS.values()
+    assert get_backend('python') == square_python
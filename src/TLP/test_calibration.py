@@ -0,0 +1,27 @@
+from src.TLP.calibration import *
+
+
+def test_measure():
+    """ Measured speed lies inside its confidence interval """
+    rate, low, high = measure(256, 'pow', rounds=3, duration=0.01)
+
+    assert 0 < low <= rate <= high
+
+
+def test_profile_lookup():
+    """ Profile gives the speed of the closest calibrated modulus size """
+    profile: Profile = Profile('host', {'python': {512: (2.0, 1.0, 3.0), 2048: (20.0, 10.0, 30.0)}})
+
+    assert profile.squares_per_second(256, 'python') == 2
+    assert profile.squares_per_second(3072, 'python') == 20
+    assert profile.squares_per_second(2048, 'montgomery') is None
+
+
+def test_profile_save_load(tmp_path):
+    """ Calibrated profile can be stored and loaded """
+    path: str = str(tmp_path / 'profile.json')
+    profile: Profile = calibrate([256, 512], ['pow', 'python'], rounds=2, warmup=0)
+    profile.save(path)
+
+    assert Profile.load(path) == profile
+    assert Profile.load(str(tmp_path / 'missing.json')) is None
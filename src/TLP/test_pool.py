@@ -0,0 +1,72 @@
+from time import sleep
+from random import seed
+
+from src.TLP.pool import *
+from src.TLP.TimeLockPuzzle import Gen, Sol, TimeLockPuzzle
+
+
+SEC: int = 256
+""" Modulus size """
+SIZE: int = 4
+""" Pool size """
+M_in: bytes = b'Hello'
+""" Message """
+
+
+def wait_full(pool: ModulusPool, timeout: float = 30.0) -> None:
+    """ Waits until the background workers fill the pool """
+    while len(pool) < pool.size and timeout > 0:
+        sleep(0.1)
+        timeout -= 0.1
+
+
+def test_pool_draw():
+    """ Pool hands out distinct prepared pairs and counts the hits and misses """
+    pool: ModulusPool = ModulusPool(SEC, SIZE, 0, 1)
+    wait_full(pool)
+
+    pairs: [(int, int)] = [pool.draw() for _ in range(SIZE + 1)]
+    pool.close()
+
+    assert pool.hits >= SIZE
+    assert pool.hits + pool.misses == SIZE + 1
+    assert len(set(pairs)) == SIZE + 1
+    assert all((P * Q).bit_length() in {SEC - 1, SEC} for P, Q in pairs)
+
+
+def test_pool_top_up():
+    """ Pool is topped up in the background once the low watermark is reached """
+    pool: ModulusPool = ModulusPool(SEC, SIZE, 2, 1)
+    wait_full(pool)
+
+    for _ in range(SIZE - 1):
+        pool.draw()
+    wait_full(pool)
+    pool.close()
+
+    assert len(pool) == SIZE
+
+
+def test_pool_gen():
+    """ TLP generation draws from the running pool unless a seed is given """
+    pool: ModulusPool = start_pool(SEC, SIZE, 1, 1)
+    wait_full(pool)
+
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, 1, 1)
+    hits: int = pool.hits
+    Gen(SEC, M_in, 1, 1, b'seed')
+    stop_pool(SEC)
+
+    assert hits == 1
+    assert pool.hits + pool.misses == 1
+    assert get_pool(SEC) is None
+    assert Sol(timeLockPuzzle) == M_in
+
+
+def test_generate_pair_keeps_seed():
+    """ Generating a pair in this process, as on a miss, does not reseed the global generator of the caller """
+    seed(SEC)
+    pair: (int, int) = generate_pair(SEC)
+    seed(SEC)
+
+    assert generate_pair(SEC) == pair
@@ -0,0 +1,62 @@
+from pytest import mark
+from time import perf_counter
+
+from src.TLP.TimeLockPuzzle import *
+from src.TLP.proof import verify
+
+
+DATA: [int] = [256, 1024]
+""" Security parameters """
+M_in: bytes = b'Hello'
+""" Message """
+
+
+@mark.parametrize("SEC", DATA)
+def test_proof_valid(SEC):
+    """ Solution with its proof is accepted and opens the puzzle """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, 1, 100_000)
+    M_out, solution = Sol(timeLockPuzzle, proof=True)
+
+    assert M_out == M_in
+    assert VerifySolution(timeLockPuzzle, solution)
+    assert unlock(timeLockPuzzle, solution.B) == M_in
+
+
+@mark.parametrize("SEC", DATA)
+def test_proof_invalid(SEC):
+    """ Wrong solution or proof is rejected """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, 1, 1_000)
+    _, solution = Sol(timeLockPuzzle, proof=True)
+    B, PI, R = solution.B, solution.PI, solution.R
+    N: int = timeLockPuzzle.N
+
+    assert not VerifySolution(timeLockPuzzle, SolutionTLP((B + 1) % N, PI, R))
+    assert not VerifySolution(timeLockPuzzle, SolutionTLP(B, (PI + 1) % N, R))
+    assert not VerifySolution(timeLockPuzzle, SolutionTLP((R + 1) ** 2 % N, PI, (R + 1) % N))
+    assert not VerifySolution(Gen(SEC, M_in, 1, 1_000), solution)
+
+
+@mark.parametrize("SEC", DATA)
+def test_proof_sign(SEC):
+    """ The proof holds up to the sign, which the square of R fixes, so a negated result is not a valid solution """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, 1, 1_000)
+    N, A, T, _, _ = timeLockPuzzle
+    _, solution = Sol(timeLockPuzzle, proof=True)
+    B, PI, R = solution.B, solution.PI, solution.R
+
+    assert verify(N, A % N, T - 1, N - R, PI)
+    assert VerifySolution(timeLockPuzzle, SolutionTLP(B, PI, N - R))
+    assert not VerifySolution(timeLockPuzzle, SolutionTLP(N - B, PI, R))
+    assert not VerifySolution(timeLockPuzzle, SolutionTLP(N - B, PI, N - R))
+
+
+def test_proof_fast():
+    """ Checking the proof is much faster than solving the puzzle """
+    timeLockPuzzle: TimeLockPuzzle = Gen(2048, M_in, 1, 100_000)
+    start: float = perf_counter()
+    _, solution = Sol(timeLockPuzzle, proof=True)
+    solving: float = perf_counter() - start
+
+    start = perf_counter()
+    assert VerifySolution(timeLockPuzzle, solution)
+    assert perf_counter() - start < solving / 10
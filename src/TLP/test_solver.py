@@ -0,0 +1,139 @@
+from asyncio import CancelledError, TimeoutError, ensure_future, run, sleep
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pytest import raises
+from time import time
+
+from src.TLP.solver import *
+from src.TLP.TimeLockPuzzle import Gen, Sol, TimeLockPuzzle
+
+
+SEC: int = 512
+""" Security parameter """
+T: int = 1
+""" Time parameter """
+S: int = 10_000
+""" Difficulty parameter """
+EVERY: int = 1_000
+""" Squares between checkpoints """
+M_in: bytes = b'Hello'
+""" Message """
+
+
+class Crash(Exception):
+    """ Simulates the solving process dying """
+
+
+def test_solver_progress():
+    """ Solver gives the same message as Sol and reports the progress after each chunk """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, T, S)
+    reports: [int] = []
+
+    solver: Solver = Solver(timeLockPuzzle, every=EVERY, progress=lambda s: reports.append(s.state.i))
+
+    assert solver.run() == Sol(timeLockPuzzle) == M_in
+    assert reports == list(range(EVERY, T * S + 1, EVERY))
+    assert solver.done and solver.rate > 0 and solver.eta == 0
+
+
+def test_solver_resume(tmp_path):
+    """ Solver that dies can be resumed from its checkpoint, the checkpoint is removed once solved """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, T, S)
+    checkpoint: str = str(tmp_path / 'tlp.json')
+
+    def crash(solver: Solver):
+        if solver.state.i == 3 * EVERY:
+            raise Crash()
+
+    with raises(Crash):
+        Solver(timeLockPuzzle, checkpoint=checkpoint, every=EVERY, progress=crash).run()
+
+    solver: Solver = Solver(timeLockPuzzle, checkpoint=checkpoint, every=EVERY)
+    assert solver.state.i == 3 * EVERY
+    assert solver.run() == M_in
+    assert not (tmp_path / 'tlp.json').exists()
+
+
+def test_solver_other_puzzle(tmp_path):
+    """ Solver refuses to resume from a state of another puzzle """
+    timeLockPuzzle1: TimeLockPuzzle = Gen(SEC, M_in, T, S)
+    timeLockPuzzle2: TimeLockPuzzle = Gen(SEC, M_in, T, S)
+    checkpoint: str = str(tmp_path / 'tlp.json')
+    SolverState.start(timeLockPuzzle1).save(checkpoint)
+
+    with raises(Exception):
+        Solver(timeLockPuzzle2, checkpoint=checkpoint)
+
+
+def test_solve_many():
+    """ Puzzles solved in parallel give the same messages as solved one by one """
+    M: [bytes] = [bytes([i]) * (i + 1) for i in range(6)]
+    timeLockPuzzles: [TimeLockPuzzle] = [Gen(SEC, m, T, S * (i % 3 + 1)) for i, m in enumerate(M)]
+
+    results: {int: bytes} = dict(solve_many(timeLockPuzzles, workers=2))
+
+    assert results == dict(enumerate(M))
+
+
+def test_solve_many_close():
+    """ Closing the generator early does not wait for the puzzles still being solved """
+    timeLockPuzzles: [TimeLockPuzzle] = [Gen(SEC, M_in, T, S), Gen(SEC, M_in, T, 100_000 * S)]
+
+    results: Generator = solve_many(timeLockPuzzles, workers=2)
+    assert next(results) == (0, M_in)
+    start: float = time()
+    results.close()
+
+    assert time() - start < 5
+
+
+def test_solver_async():
+    """ Solver can run in the event loop executor """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, T, S)
+
+    assert run(Solver(timeLockPuzzle, every=EVERY).run_async()) == M_in
+    with ThreadPoolExecutor(1) as executor:
+        assert run(Solver(timeLockPuzzle, every=EVERY).run_async(executor=executor)) == M_in
+    with ProcessPoolExecutor(1) as executor, raises(Exception):
+        run(Solver(timeLockPuzzle, every=EVERY).run_async(executor=executor))
+
+
+def test_solver_async_cancel():
+    """ Cancelled solving keeps its progress and can be resumed """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, T, 50 * S)
+    solver: Solver = Solver(timeLockPuzzle, every=EVERY, backend='python')
+
+    async def cancel_later():
+        task = ensure_future(solver.run_async())
+        await sleep(0.05)
+        task.cancel()
+        with raises(CancelledError):
+            await task
+
+    run(cancel_later())
+    assert 0 < solver.state.i < 50 * S * T
+    assert solver.state.i % EVERY == 0
+
+    resumed: Solver = Solver(timeLockPuzzle, state=solver.state, every=EVERY)
+    assert run(resumed.run_async()) == M_in
+
+
+def test_solver_async_deadline():
+    """ Solving is aborted once the deadline passes """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, T, 50 * S)
+    solver: Solver = Solver(timeLockPuzzle, every=EVERY, backend='python')
+
+    with raises(TimeoutError):
+        run(solver.run_async(deadline=time() + 0.05))
+    assert 0 < solver.state.i < 50 * S * T
+
+
+def test_solver_async_deadline_chunk():
+    """ Chunks are shortened to the deadline, so it is not overshot by a whole chunk """
+    timeLockPuzzle: TimeLockPuzzle = Gen(SEC, M_in, T, 1_000 * S)
+    solver: Solver = Solver(timeLockPuzzle, every=1_000 * S * T, backend='python')
+
+    deadline: float = time() + 0.2
+    with raises(TimeoutError):
+        run(solver.run_async(deadline=deadline))
+    assert time() - deadline < 0.2
+    assert 0 < solver.state.i < 1_000 * S * T
@@ -0,0 +1,36 @@
+from io import BytesIO
+from os import urandom
+
+from src.TLP.TimeLockPuzzle import *
+
+
+SEC: int = 512
+""" Security parameter """
+T: int = 1
+""" Time parameter """
+S: int = 1_000
+""" Difficulty parameter """
+
+
+def test_stream_file():
+    """ Message read from a file is locked and decrypted chunk by chunk """
+    M_in: bytes = urandom(3 * STREAM_CHUNK + 123)
+
+    timeLockPuzzle, C = GenStream(SEC, BytesIO(M_in), T, S)
+    C_file: BytesIO = BytesIO(b''.join(C))
+    M_out: bytes = b''.join(SolStream(timeLockPuzzle, C_file))
+
+    assert len(timeLockPuzzle.C_M) == SALSA20_NONCE_LENGTH
+    assert M_out == M_in
+
+
+def test_stream_iterator():
+    """ Message given by an iterator is locked the same way as the whole message """
+    M_in: [bytes] = [urandom(size) for size in [1, 100, 7, 1000]]
+    seed: bytes = urandom(32)
+
+    timeLockPuzzle, C = GenStream(SEC, iter(M_in), T, S, seed)
+    C: bytes = b''.join(C)
+
+    assert timeLockPuzzle.C_M + C == Gen(SEC, b''.join(M_in), T, S, seed).C_M
+    assert b''.join(SolStream(timeLockPuzzle, [C[:10], C[10:]])) == b''.join(M_in)
@@ -98,6 +98,22 @@ def measure_Verify_e():
     plot(e_test, T_avg, TitleES.Verify, Parameters.e, Results.Time)
 
 
+def measure_VerifyBatch(sec: int, m: str, n: int):
+    """ Validates a batch of n signatures from one epoch and measures the throughput """
+    PK, SK = ES.Gen(sec, 1, E, 1)
+    _, SK = ES.Evolve(SK)
+    batch: [] = [(ES.Sign(SK, m), m) for _ in range(n)]
+    T: float = timeit(lambda: ES.VerifyBatch(PK, 1, batch, check_expired=False), number=N) / N
+
+    return round(n / T, P)
+
+
+def measure_VerifyBatch_n():
+    n_test: [int] = [1, 10, 100, 1000]
+    S_avg: [float] = [measure_VerifyBatch(sec, m, n) for n in n_test]
+    plot(n_test, S_avg, TitleES.VerifyBatch, Parameters.n, Results.Throughput)
+
+
 def measure_AltSign(sec: int, m: str, e: int):
     """ Runs the forgery function N times and measures its speed """
     PK, SK = ES.Gen(sec, 1, E, 1)
@@ -219,6 +235,7 @@ EXPERIMENTS: [Callable] = [
     measure_Verify_SEC,
     measure_Verify_m,
     measure_Verify_e,
+    measure_VerifyBatch_n,
     measure_AltSign_SEC,
     measure_AltSign_m,
     measure_AltSign_e,
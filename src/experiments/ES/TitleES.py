@@ -6,6 +6,7 @@ class TitleES(Enum):
     Gen: str = 'ES.Gen'
     Sign: str = 'ES.Sign'
     Verify: str = 'ES.Verify'
+    VerifyBatch: str = 'ES.VerifyBatch'
     AltSign: str = 'ES.AltSign'
     Evolve: str = 'ES.Evolve'
     SchemeKey: str = 'ES.SchemeKey'
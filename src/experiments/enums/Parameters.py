@@ -10,3 +10,4 @@ class Parameters(Enum):
     t: str = 'Timestamp [s]'
     T: str = 'Max timestamp [s]'
     N: str = 'Base [n]'
+    n: str = 'Batch [n]'
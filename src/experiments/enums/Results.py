@@ -5,3 +5,4 @@ class Results(Enum):
     """ Labels for individual results """
     Time: str = 'Time [s]'
     Size: str = 'Size [Kib]'
+    Throughput: str = 'Throughput [sig/s]'
@@ -1,31 +1,68 @@
 from src.TLP import *
+from src.TLP.backends import BACKENDS
+from src.TLP.solver import solve_many
+from os import cpu_count
 from timeit import timeit
 
+from libnum import generate_prime
 
-def get_squares_per_second():
-    """ Get the amount of square operation that are adequate to a second of puzzle solving """
-    T: int = 1
-    """ One second """
-    SEC: int = 2048
-    """ Security parameter """
+from src.experiments.config import N, P
+from src.TLP.calibration import S_DEFAULT
+
+T_test: [int] = [1, 60, 60 * 60, 24 * 60 * 60, 7 * 24 * 60 * 60]
+""" Lock times in seconds (a second, a minute, an hour, a day and a week) """
+
+PARAMETER_SETS: {} = {
+    'ES-256': (256, S_DEFAULT),
+    'ES-512': (512, S_DEFAULT),
+    'TDS-2048': (2048, S_DEFAULT),
+}
+""" Time-lock puzzle security parameter and squares per second used by the schemes """
+
+SEC_test: [int] = [1024, 2048, 3072]
+""" Modulus sizes """
+
+
+def measure_Gen_T():
+    """ Runs the time-lock puzzle generation N times for each lock time and parameter set and measures its speed """
     M: bytes = b'hello'
     """ Message to encapsulate in the time-lock puzzle """
-    S: int = 10_000
-    """ Initial number of squares """
 
-    while True:
-        timeLockPuzzle: TimeLockPuzzle = GenTLP(SEC, M, T, S)
-        result: float = timeit(lambda: SolTLP(timeLockPuzzle), number=1)
+    for name, (SEC, S) in PARAMETER_SETS.items():
+        for T in T_test:
+            result: float = timeit(lambda: GenTLP(SEC, M, T, S), number=N) / N
+
+            print(f'{name} {T} {round(result, P)}')
+
+
+def measure_backends():
+    """ Measures the amount of squaring operations per second of each backend for different modulus sizes """
+    O: int = 100_000
+    """ Number of squares """
+
+    for SEC in SEC_test:
+        modulus: int = generate_prime(SEC // 2) * generate_prime(SEC // 2)
+        for name, backend in BACKENDS.items():
+            result: float = timeit(lambda: backend(3, O, modulus), number=1)
+
+            print(f'{SEC} {name} {round(O / result)}')
+
+
+def measure_solve_many():
+    """ Measures the amount of puzzles solved per second by solve_many for 1 up to all the processors """
+    M: bytes = b'hello'
+    """ Message to encapsulate in the time-lock puzzle """
+    COUNT: int = 4 * cpu_count()
+    """ Number of puzzles """
 
-        print(f'{S} {result}')
-        if result > 1.0:
-            S -= round(S / 4)
-        else:
-            S += round(S / 4)
+    timeLockPuzzles: [TimeLockPuzzle] = [GenTLP(2048, M, 1, S_DEFAULT) for _ in range(COUNT)]
+    for workers in range(1, cpu_count() + 1):
+        result: float = timeit(lambda: list(solve_many(timeLockPuzzles, workers)), number=1)
 
-        if abs(result - 1.0) < 0.01:
-            break
+        print(f'{workers} {round(COUNT / result, P)}')
 
 
 if __name__ == '__main__':
-    get_squares_per_second()
+    measure_Gen_T()
+    measure_backends()
+    measure_solve_many()
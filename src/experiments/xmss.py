@@ -0,0 +1,79 @@
+from src.schemes.ES.XMSStree.XMSS import *
+from src.schemes.ES.XMSStree.XMSSMT import XMSSMT_keyGen, XMSSMT_sign
+from src.schemes.ES.EpochalSignatureScheme import XMSS_VARIANTS, XMSS_LAYERS
+
+from src.experiments.config import N, P
+from timeit import default_timer, timeit
+from os import cpu_count
+
+H_test: [int] = [4, 6, 8]
+""" Tree heights """
+
+
+class CountingHasher:
+    """ Wraps a hash function and counts its calls """
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+        self.binary = getattr(hasher, 'binary', False)
+        self.calls = 0
+
+    def __call__(self, data=b''):
+        self.calls += 1
+        return self.hasher(data)
+
+
+def measure_hash_calls():
+    """ Counts the hash function calls and measures the time of the XMSS key generation, signing and verification """
+    for SEC, (n, w, _, _, hasher) in XMSS_VARIANTS.items():
+        if SEC in XMSS_LAYERS:
+            continue
+        for h in H_test:
+            counter: CountingHasher = CountingHasher(hasher)
+            M: bytes = hasher(b'hello').digest()
+
+            start: float = default_timer()
+            SK, PK = XMSS_keyGen(n, w, h, counter)
+            keyGen: (int, float) = (counter.calls, default_timer() - start)
+
+            counter.calls, start = 0, default_timer()
+            SIG = XMSS_sign(M, SK, w, ADRS(), h, counter)
+            sign: (int, float) = (counter.calls, default_timer() - start)
+
+            counter.calls, start = 0, default_timer()
+            XMSS_verify(SIG, M, PK, w, PK.SEED, h, counter)
+            verify: (int, float) = (counter.calls, default_timer() - start)
+
+            for name, (calls, result) in [('keyGen', keyGen), ('sign', sign), ('verify', verify)]:
+                print(f'{SEC} {h} {name} {calls} {round(result, P)}')
+
+
+def measure_multi_tree():
+    """ Measures the key generation and the signing time of the multi-tree variants, the first signature derives the
+    lower subtrees """
+    for variant, d in XMSS_LAYERS.items():
+        n, w, _, h, hasher = XMSS_VARIANTS[variant]
+        M: bytes = hasher(b'hello').digest()
+
+        keyGen: float = timeit(lambda: XMSSMT_keyGen(n, w, h, d, hasher), number=1)
+        SK, PK = XMSSMT_keyGen(n, w, h, d, hasher)
+        first: float = timeit(lambda: XMSSMT_sign(M, SK, w, ADRS(), h, hasher), number=1)
+        sign: float = timeit(lambda: XMSSMT_sign(M, SK, w, ADRS(), h, hasher), number=N) / N
+
+        print(f'{variant} {2 ** h} {round(keyGen, P)} {round(first, P)} {round(sign, P)}')
+
+
+def measure_parallel_keyGen():
+    """ Measures the XMSS key generation time for 1 up to all the processors """
+    for SEC in [256, 512]:
+        n, w, _, h, hasher = XMSS_VARIANTS[SEC]
+        for workers in range(1, cpu_count() + 1):
+            result: float = timeit(lambda: XMSS_keyGen(n, w, h, hasher, workers=workers), number=1)
+
+            print(f'{SEC} {workers} {round(result, P)}')
+
+
+if __name__ == '__main__':
+    measure_hash_calls()
+    measure_multi_tree()
+    measure_parallel_keyGen()
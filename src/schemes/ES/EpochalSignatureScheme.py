@@ -1,34 +1,59 @@
 from hashlib import sha256, sha512  # Hashing
 from pickle import dumps, loads  # Object from/to bytes
 from time import time, sleep  # Timestamp and process idle
+from typing import Callable  # Type hint
 from os import urandom  # Random byte-stream
+from concurrent.futures import Executor, ThreadPoolExecutor  # Worker processes and threads
+from dataclasses import replace  # Copy of a frozen key with changed fields
+from copy import copy  # Object copying
 
 from Crypto.PublicKey.RSA import RsaKey
 
 from src.schemes.DeniableSignatureScheme import DeniableSignatureScheme
-from src.schemes.SignatureScheme import generate, sign, verify
+from src.schemes.SignatureScheme import generate, sign, verify, verify_many
 from src.TLP import *
+from src.TLP.calibration import squares_per_second, S_DEFAULT as TLP_S
 from . import *
+from .XMSStree.utils import Raw
 
 
-TLP_S: int = 100_000
-""" The amount of squaring operation per second (parameter for the time-lock puzzle) """
-
 XMSS_VARIANTS: {} = {
     256: (32, 16, 67, 10, sha256),
-    512: (64, 16, 131, 10, sha512)
+    512: (64, 16, 131, 10, sha512),
+    'raw-256': (32, 16, 67, 10, Raw(sha256)),
+    'raw-512': (64, 16, 131, 10, Raw(sha512)),
+    'mt-256': (32, 16, 67, 24, sha256),
+    'mt-512': (64, 16, 131, 24, sha512),
+    'raw-mt-256': (32, 16, 67, 24, Raw(sha256)),
+    'raw-mt-512': (64, 16, 131, 24, Raw(sha512)),
+}
+""" Possible XMSS variants, the raw ones are a compact variant outside of RFC 8391 with half the node size """
+
+XMSS_LAYERS: {} = {
+    'mt-256': 4,
+    'mt-512': 4,
+    'raw-mt-256': 4,
+    'raw-mt-512': 4,
 }
-""" Possible XMSS variants """
+""" Number of layers of the multi-tree XMSS variants, the others have a single tree """
 
 SEC_dynamic: int = 2048
 """ Dynamic scheme security parameter length """
 
+BATCH_CHUNK: int = 32
+""" Least amount of dynamic signatures handed to a worker by the batch verification, smaller batches are not split """
+
+EVOLVE_EXECUTOR: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ES.Evolve')
+""" Background thread preparing the next epoch of the pipelined evolve, one epoch is prepared at a time """
+
 
 class EpochalSignatureScheme(DeniableSignatureScheme):
     """ Create ephemeral signatures which are valid during the duration of discrete time frames """
 
     @staticmethod
-    def Gen(SEC: int, D: int, E: int, V: int) -> (PublicKeyES, SecretKeyES):
+    def Gen(
+            SEC: int, D: int, E: int, V: int, reuse_modulus: bool = False, variant: str = None, workers: int = None
+    ) -> (PublicKeyES, SecretKeyES):
         """
         Generate the ES scheme key pair
 
@@ -36,15 +61,22 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
         :param D: epoch duration in seconds
         :param E: the amount of epochs
         :param V: the amount of epochs for which a signature is valid (has to be larger than 0)
+        :param reuse_modulus: lock all the epoch puzzles under one modulus kept in SK, evolving gets faster, but the
+            epoch infos then share the modulus, which sets them apart from the forged ones
+        :param variant: key of the XMSS variant, the one of the security parameter is used if not given
+        :param workers: number of processes to generate the XMSS tree with, the multi-tree variants generate only one
+            subtree and do not use them
 
         :return: ES scheme key pair
         """
         # Generate the static key pair and the initial random value
-        try:
-            n, w, length, h, hasher = XMSS_VARIANTS[SEC]
-        except KeyError:
-            raise Exception("SEC = {256, 512}")
-        SK_static, PK_static = XMSS_keyGen(n, w, h, hasher)
+        n, w, length, h, hasher = EpochalSignatureScheme._get_xmss(SEC, variant)
+        if XMSS_LAYERS.get(variant, 1) > 1:
+            # Only the top subtree is generated, so the amount of epochs is not bound by the key generation time
+            SK_static, PK_static = XMSSMT_keyGen(n, w, h, XMSS_LAYERS[variant], hasher)
+        else:
+            # The pebbler hands out the static keys from the end of the chain, so the signing indices descend
+            SK_static, PK_static = XMSS_keyGen(n, w, h, hasher, traversal=-1, workers=workers)
 
         # Initialise the pebbling states
         SK_new: PebbleState = PebbleState(SK_static, update, E, V)
@@ -57,17 +89,23 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
 
         # Compose the ES scheme key pair
         t0: float = time()
-        PK: PublicKeyES = PublicKeyES(PK_static, t0, D, E, V, SEC)
-        SK: SecretKeyES = SecretKeyES(PK, (SK_r_new, SK_r_exp), (SK_new, SK_exp), 0, None, None)
+        S: int = EpochalSignatureScheme._get_tlp_s(SEC)
+        PK: PublicKeyES = PublicKeyES(PK_static, t0, D, E, V, SEC, variant, S)
+        ctx: PuzzleContext = None
+        if reuse_modulus:
+            ctx = PuzzleContext.new(SEC, S)
+        SK: SecretKeyES = SecretKeyES(PK, (SK_r_new, SK_r_exp), (SK_new, SK_exp), 0, None, None, ctx)
 
         return PK, SK
 
     @staticmethod
-    def Evolve(SK: SecretKeyES) -> (Pinfo, SecretKeyES):
+    def Evolve(SK: SecretKeyES, pipelined: bool = False) -> (Pinfo, SecretKeyES):
         """
         Derive the new epoch secret key from the previous epoch one
 
         :param SK: the current secret key
+        :param pipelined: prepare the key of the epoch after the new one in a background thread, the following call
+            then only swaps it in when the epoch starts, so signing is not interrupted at the epoch boundary
 
         :return: the public parameters for the new epoch and the new secret key
         """
@@ -85,34 +123,21 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
                 else:
                     sleep(diff / 2)
 
-        # Get the previous epoch values and wait until the next epoch starts
-        PK, (SK_r_new, SK_r_exp), (SK_new, SK_exp), e, _, _ = SK.params
-        PK_static, t0, D, E, V, SEC = PK.params
-        e_new: int = e + 1
-        sleep_until(t0 + e_new * D)
-
-        # Update the states
-        r_new: (bytes, int) = SK_r_new.perform_update()
-        r_exp: (bytes, int) = SK_r_exp.perform_update()
-        sk_new: XMSSPrivateKey = SK_new.perform_update()
-        sk_exp: XMSSPrivateKey = SK_exp.perform_update()
-
-        # Get the next secret dynamic epoch key
-        r_pk: (bytes, int) = EpochalSignatureScheme._get_r_pk_dynamic(r_new, PK_static, SEC)
-        SK_dynamic, PK_dynamic = generate(SEC_dynamic, r_pk[0])
-
-        # Create the time-lock puzzle with the current random value and the current secret key
-        r_tl: (bytes, int) = EpochalSignatureScheme._get_r_tlp(r_new, PK_static, SEC)
-        M_in: bytes = EpochalSignatureScheme._get_tlp_bytes(r_new, sk_new)
-        tl: TimeLockPuzzle = GenTLP(SEC, M_in, V * D, TLP_S, r_tl[0])
+        # Take the new epoch values prepared in advance, or derive them, and wait until the next epoch starts
+        PK, e = SK.PK, SK.e
+        T: float = PK.t0 + (e + 1) * PK.D
+        if SK.next is None and not pipelined:
+            sleep_until(T)
+        if SK.next is not None and SK.next.exception() is None:
+            pinfo_e_new, SK = SK.next.result()
+        else:
+            # A failed preparation leaves the states as they were, so it is done again and raises if it fails again
+            pinfo_e_new, SK = EpochalSignatureScheme._prepare(SK)
+        sleep_until(T)
 
-        # Compose the public info and the new ES scheme secret key
-        try:
-            n, w, length, h, hasher = XMSS_VARIANTS[SEC]
-        except KeyError:
-            raise Exception("SEC = {256, 512}")
-        pinfo_e_new: Pinfo = Pinfo(PK_dynamic, e_new, r_exp, sk_exp, tl, sk_new, w, h, hasher)
-        SK: SecretKeyES = SecretKeyES(PK, (SK_r_new, SK_r_exp), (SK_new, SK_exp), e_new, SK_dynamic, pinfo_e_new)
+        # Start preparing the epoch after the new one while the new one runs
+        if pipelined and SK.e < PK.E:
+            SK = replace(SK, next=EVOLVE_EXECUTOR.submit(EpochalSignatureScheme._prepare, SK))
 
         return pinfo_e_new, SK
 
@@ -128,7 +153,7 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
         """
         _, _, _, _, SK_dynamic, pinfo_e = SK.params
 
-        SIG_dynamic: bytes = sign(SK_dynamic, pinfo_e.get_dynamic_args(m))
+        SIG_dynamic: bytes = sign(SK_dynamic, m.encode('ascii'), pinfo_e.get_dynamic_prefix())
 
         return SIG_dynamic, pinfo_e
 
@@ -145,30 +170,61 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
 
         :return: whether the signature is valid
         """
-        # Get the values for the current epoch and the epoch when the signature was created
-        PK_static, _, _, E, V, SEC = PK.params
         SIG_dynamic, pinfo_e = SIG
-        PK_dynamic, e, _, _, _, SIG_static = pinfo_e.params
 
-        # Make sure that the epoch is valid
-        if e_current <= 0 or e <= 0 or e > e_current or e_current > E:
-            return False
-        if e + V <= e_current and check_expired:
-            return False
+        return EpochalSignatureScheme._verify_epoch(PK, e_current, pinfo_e.e, check_expired) and \
+            EpochalSignatureScheme._verify_static(PK, pinfo_e) and \
+            EpochalSignatureScheme._verify_dynamic(pinfo_e, SIG_dynamic, m)
 
-        # Verify the static signature
-        try:
-            n, w, length, h, hasher = XMSS_VARIANTS[SEC]
-        except KeyError:
-            raise Exception("SEC = {256, 512}")
-        valid_static: bool = XMSS_verify(
-            SIG_static, hasher(pinfo_e.static_args).digest(), PK_static, w, PK_static.SEED, h, hasher
-        )
+    @staticmethod
+    def VerifyBatch(
+            PK: PublicKeyES, e_current: int, batch: [((int, Pinfo), str)], check_expired: bool = True,
+            executor: Executor = None, chunk: int = BATCH_CHUNK
+    ) -> [bool]:
+        """
+        Validates many signatures at once, the signatures are grouped by their epoch info, the static signature of each
+        epoch info is verified once and the dynamic signatures are verified in chunks
 
-        # Verify the dynamic signature
-        valid_dynamic: bool = verify(PK_dynamic, pinfo_e.get_dynamic_args(m), SIG_dynamic)
+        :param PK: ES scheme public key
+        :param e_current: current epoch number
+        :param batch: list of signature tuples and the messages to validate them for
+        :param check_expired: check whether a signature is valid, even tho it is already expired (for testing purposes)
+        :param executor: long-lived executor to verify the chunks in, everything runs in this process if not given
+        :param chunk: least amount of dynamic signatures per chunk, the executor is used only with more than one chunk
 
-        return valid_static and valid_dynamic
+        :return: whether each signature is valid, in the order of the batch
+        """
+        results: [bool] = [False] * len(batch)
+
+        # Group the signatures of the valid epochs by the encoding of the values of their epoch info
+        groups: {} = {}
+        for i, ((_, pinfo_e), _) in enumerate(batch):
+            if EpochalSignatureScheme._verify_epoch(PK, e_current, pinfo_e.e, check_expired):
+                dynamic_args: bytes = pinfo_e.encode_dynamic()
+                groups.setdefault(sha512(dynamic_args).digest(), (pinfo_e, dynamic_args, []))[2].append(i)
+
+        # Verify each static signature once and split the dynamic signatures into chunks, the last one takes the rest
+        chunks: [([int], (bytes, bytes, [(bytes, bytes)]))] = []
+        for pinfo_e, dynamic_args, indices in groups.values():
+            if not EpochalSignatureScheme._verify_static(PK, pinfo_e):
+                continue
+            PK_dynamic: bytes = pinfo_e.PK_dynamic.export_key(format='DER')
+            starts: range = range(0, max(len(indices) - chunk, 0) + 1, chunk)
+            for j, start in enumerate(starts):
+                part: [int] = indices[start:start + chunk] if j < len(starts) - 1 else indices[start:]
+                items: [(bytes, bytes)] = [(batch[i][1].encode('ascii'), batch[i][0][0]) for i in part]
+                chunks.append((part, (PK_dynamic, dynamic_args, items)))
+
+        if executor is not None and len(chunks) > 1:
+            valid = list(executor.map(verify_many, *zip(*(args for _, args in chunks))))
+        else:
+            valid = [verify_many(*args) for _, args in chunks]
+
+        for (part, _), valid_part in zip(chunks, valid):
+            for i, valid_dynamic in zip(part, valid_part):
+                results[i] = valid_dynamic
+
+        return results
 
     @staticmethod
     def AltSign(PK: PublicKeyES, pinfo_e: Pinfo, eAlt: int, m: str, use_tl: bool = False) -> (int, Pinfo):
@@ -188,7 +244,7 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
             M_in: bytes = SolTLP(tlp)
             M: {} = loads(M_in)
 
-            return (M['r'], M['r_e']), M['sk']
+            return (M['r'], M['r_e']), XMSS_recover(M['sk'], PK.PK_static)
 
         def extract_SK() -> ([RsaKey], [(bytes, int)]):
             """ Returns all the expired keys and random values starting from epoch e - 1 """
@@ -210,7 +266,7 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
         if use_tl:
             r_e, sk_e = solve_tlp(pinfo_e.tl)
         else:
-            r_e, sk_e = pinfo_e.r, pinfo_e.SK_static_exp
+            r_e, sk_e = pinfo_e.r, XMSS_recover(pinfo_e.SK_static_exp, PK.PK_static)
 
         # Get the expired keys and random values and choose the relevant once
         past: ([XMSSPrivateKey], [(bytes, int)]) = extract_SK()
@@ -224,7 +280,7 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
         SK_dynamic, PK_dynamic = generate(SEC_dynamic, r_pk[0])
         r_tl: (bytes, int) = EpochalSignatureScheme._get_r_tlp(r, PK.PK_static, SEC)
         M_in: bytes = EpochalSignatureScheme._get_tlp_bytes(r, sk)
-        tl: TimeLockPuzzle = GenTLP(SEC, M_in, PK.V * PK.D, TLP_S, r_tl[0])
+        tl: TimeLockPuzzle = GenTLP(SEC, M_in, PK.V * PK.D, PK.S, r_tl[0])
 
         sk_exp: XMSSPrivateKey = sk
         r_exp: (bytes, int) = r
@@ -232,11 +288,8 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
             sk_exp = update(sk_exp)
             r_exp = get_random_value(r_exp, PK.PK_static, Seed.PEBBLE, SEC)
 
-        try:
-            n, w, length, h, hasher = XMSS_VARIANTS[SEC]
-        except KeyError:
-            raise Exception("SEC = {256, 512}")
-        pinfo_eAlt: Pinfo = Pinfo(PK_dynamic, eAlt, r_exp, sk_exp, tl, sk, w, h, hasher)
+        n, w, length, h, hasher = EpochalSignatureScheme._get_xmss(SEC, PK.variant)
+        pinfo_eAlt: Pinfo = Pinfo(PK_dynamic, eAlt, r_exp, XMSS_disclose(sk_exp), tl, sk, w, h, hasher)
         SK_alt: SecretKeyES = SecretKeyES(None, None, None, None, SK_dynamic, pinfo_eAlt)
 
         return EpochalSignatureScheme.Sign(SK_alt, m)
@@ -247,7 +300,7 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
         M: {} = {
             'r': r[0],
             'r_e': r[1],
-            'sk': sk,
+            'sk': XMSS_disclose(sk),
         }
         return dumps(M)
 
@@ -260,3 +313,82 @@ class EpochalSignatureScheme(DeniableSignatureScheme):
     def _get_r_tlp(r: (bytes, int), PK_static: RsaKey, SEC: int) -> (bytes, int):
         """ Calculate the random value needed to derive the time-lock puzzle """
         return get_random_value(r, PK_static, Seed.TIME_LOCK_PUZZLE, SEC)
+
+    @staticmethod
+    def _get_tlp_s(SEC: int) -> int:
+        """ Get the amount of squaring operations per second for the time-lock puzzle from the machine profile """
+        return squares_per_second(SEC, TLP_S)
+
+    @staticmethod
+    def _get_xmss(SEC: int, variant: str = None) -> ():
+        """ Get the XMSS parameters of the variant, or of the security parameter if no variant is given """
+        try:
+            return XMSS_VARIANTS[SEC if variant is None else variant]
+        except KeyError:
+            raise Exception("SEC = {256, 512}" if variant is None else f"variant = {set(XMSS_VARIANTS)}")
+
+    @staticmethod
+    def _verify_epoch(PK: PublicKeyES, e_current: int, e: int, check_expired: bool = True) -> bool:
+        """ Make sure that the epoch of the signature is valid in the current epoch """
+        if e_current <= 0 or e <= 0 or e > e_current or e_current > PK.E:
+            return False
+        if e + PK.V <= e_current and check_expired:
+            return False
+        return True
+
+    @staticmethod
+    def _verify_static(PK: PublicKeyES, pinfo_e: Pinfo) -> bool:
+        """ Verify the static signature of the public info """
+        PK_static: XMSSPublicKey = PK.PK_static
+        n, w, length, h, hasher = EpochalSignatureScheme._get_xmss(PK.SEC, PK.variant)
+        verify_static: Callable = XMSSMT_verify if isinstance(PK_static, XMSSMTPublicKey) else XMSS_verify
+
+        return verify_static(
+            pinfo_e.SIG_static, hasher(pinfo_e.encode_static()).digest(), PK_static, w, PK_static.SEED, h, hasher
+        )
+
+    @staticmethod
+    def _verify_dynamic(pinfo_e: Pinfo, SIG_dynamic: bytes, m: str) -> bool:
+        """ Verify the dynamic signature of the message """
+        return verify(pinfo_e.PK_dynamic, pinfo_e.get_dynamic_args(m), SIG_dynamic)
+
+    @staticmethod
+    def _prepare(SK: SecretKeyES) -> (Pinfo, SecretKeyES):
+        """
+        Derives the public parameters and the secret key of the epoch after the one of SK, without waiting. The states
+        are only advanced once everything is derived, so if it fails, the states stay as they were and it can be retried
+        """
+        PK, (SK_r_new, SK_r_exp), (SK_new, SK_exp), e, _, _ = SK.params
+        PK_static, t0, D, E, V, SEC = PK.params
+        e_new: int = e + 1
+
+        # Take the next values of the states
+        r_new: (bytes, int) = SK_r_new.peek()
+        r_exp: (bytes, int) = SK_r_exp.peek()
+        sk_new: XMSSPrivateKey = SK_new.peek()
+        sk_exp: XMSSPrivateKey = SK_exp.peek()
+
+        # Get the next secret dynamic epoch key
+        r_pk: (bytes, int) = EpochalSignatureScheme._get_r_pk_dynamic(r_new, PK_static, SEC)
+        SK_dynamic, PK_dynamic = generate(SEC_dynamic, r_pk[0])
+
+        # Create the time-lock puzzle with the current random value and the current secret key
+        r_tl: (bytes, int) = EpochalSignatureScheme._get_r_tlp(r_new, PK_static, SEC)
+        M_in: bytes = EpochalSignatureScheme._get_tlp_bytes(r_new, sk_new)
+        if SK.ctx:
+            tl: TimeLockPuzzle = SK.ctx.lock(M_in, V * D, r_tl[0])
+        else:
+            tl: TimeLockPuzzle = GenTLP(SEC, M_in, V * D, PK.S, r_tl[0])
+
+        # Compose the public info and the new ES scheme secret key
+        n, w, length, h, hasher = EpochalSignatureScheme._get_xmss(SEC, PK.variant)
+        pinfo_e_new: Pinfo = Pinfo(PK_dynamic, e_new, r_exp, XMSS_disclose(sk_exp), tl, copy(sk_new), w, h, hasher)
+        SK: SecretKeyES = SecretKeyES(
+            PK, (SK_r_new, SK_r_exp), (SK_new, SK_exp), e_new, SK_dynamic, pinfo_e_new, SK.ctx
+        )
+
+        # Advance the states
+        for state in (SK_r_new, SK_r_exp, SK_new, SK_exp):
+            state.perform_update()
+
+        return pinfo_e_new, SK
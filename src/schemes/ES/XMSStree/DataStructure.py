@@ -1,11 +1,114 @@
+from mmap import mmap
+from struct import Struct
+
+WORD = Struct('>I')
+DOUBLE_WORD = Struct('>Q')
+SIG_HEADER = Struct('>IBBBB')
+SIG_MT_HEADER = Struct('>QBBBBB')
+DISCLOSURE = Struct('>QBB')
+NODE_HEADER = Struct('>II')
+ZERO = bytes(16)
+
+
 class XMSSPrivateKey:
 
     def __init__(self):
-        self.wots_private_keys = None
+        self.SK_SEED = None
+        self.layer = 0
+        self.tree = 0
         self.idx = None
         self.SK_PRF = None
         self.root_value = None
         self.SEED = None
+        self.bds = None
+        self.nodes = None
+
+    def __copy__(self):
+        # Copies of the key share the traversal state and the node store
+        SK = XMSSPrivateKey()
+        SK.__dict__.update(self.__dict__)
+        return SK
+
+    def __getstate__(self):
+        # The traversal state and the node store are only caches, they are not serialized, so the bytes of a key do
+        # not change as it signs
+        state = self.__dict__.copy()
+        state['bds'] = None
+        state['nodes'] = None
+        return state
+
+
+class NodeStore:
+    # All the nodes of the tree in one contiguous buffer, level by level from the leaves, optionally mapped to a file.
+    # The buffer starts with the tree height and the node length, a file of other parameters, or an empty or cut one,
+    # is not read and gets reallocated once the first node is stored
+
+    def __init__(self, h, path=None, n=None):
+        self.h = h
+        self.path = path
+        self.n = None
+        self.buffer = None
+        if path is not None:
+            try:
+                with open(path, 'r+b') as file:
+                    header = file.read(NODE_HEADER.size)
+                    if len(header) == NODE_HEADER.size:
+                        h_file, n_file = NODE_HEADER.unpack(header)
+                        size = NODE_HEADER.size + ((1 << (h + 1)) - 1) * n_file
+                        if h_file == h and n in {None, n_file} and n_file and file.seek(0, 2) == size:
+                            self.buffer = mmap(file.fileno(), size)
+                            self.n = n_file
+            except FileNotFoundError:
+                pass
+
+    def offset(self, height, index):
+        return NODE_HEADER.size + ((1 << (self.h + 1)) - (1 << (self.h + 1 - height)) + index) * self.n
+
+    def allocate(self, n):
+        self.n = n
+        size = NODE_HEADER.size + ((1 << (self.h + 1)) - 1) * n
+        if self.path is None:
+            self.buffer = bytearray(size)
+        else:
+            with open(self.path, 'w+b') as file:
+                file.truncate(size)
+                self.buffer = mmap(file.fileno(), size)
+        NODE_HEADER.pack_into(self.buffer, 0, self.h, n)
+
+    def __getitem__(self, key):
+        offset = self.offset(*key)
+        return bytearray(self.buffer[offset:offset + self.n])
+
+    def __setitem__(self, key, node):
+        if self.buffer is None or len(node) != self.n:
+            self.allocate(len(node))
+        offset = self.offset(*key)
+        self.buffer[offset:offset + self.n] = node
+
+    def flush(self):
+        if isinstance(self.buffer, mmap):
+            self.buffer.flush()
+
+
+class TreeHashInstance:
+
+    def __init__(self, height, index):
+        self.height = height
+        self.index = index
+        self.next = 0
+        self.stack = []
+        self.node = None
+
+
+class BDSState:
+
+    def __init__(self, h, direction):
+        self.h = h
+        self.direction = direction
+        self.leaf = None
+        self.auth = [None] * h
+        self.treehash = [None] * h
+        self.nodes = None
 
 
 class XMSSPublicKey:
@@ -16,6 +119,38 @@ class XMSSPublicKey:
         self.SEED = None
 
 
+class XMSSMTPrivateKey:
+    # Multi-tree key, the subtrees are derived from SK_SEED when they are first needed
+
+    def __init__(self):
+        self.idx = 0
+        self.d = None
+        self.SK_PRF = None
+        self.SK_SEED = None
+        self.SEED = None
+        self.root_value = None
+        self.trees = {}
+
+    def __copy__(self):
+        # Copies of the key share the subtrees
+        SK = XMSSMTPrivateKey()
+        SK.__dict__.update(self.__dict__)
+        return SK
+
+    def __getstate__(self):
+        # The subtrees are only a cache, they are derived again after loading
+        state = self.__dict__.copy()
+        state['trees'] = None
+        return state
+
+
+class XMSSMTPublicKey(XMSSPublicKey):
+
+    def __init__(self):
+        super().__init__()
+        self.d = None
+
+
 class XMSSKeypair:
 
     def __init__(self, SK, PK):
@@ -24,12 +159,64 @@ class XMSSKeypair:
 
 
 class SigXMSS:
-    def __init__(self, idx_sig, r, sig, SK, M2):
+    # Pickled as its encoding: index, length of r, node length, number of WOTS and authentication nodes, then r and
+    # the nodes
+
+    def __init__(self, idx_sig, r, sig):
         self.idx_sig = idx_sig
         self.r = r
         self.sig = sig
-        self.SK = SK
-        self.M2 = M2
+
+    def toBytes(self):
+        sig_ots, auth = self.sig.sig_ots, self.sig.auth
+        header = SIG_HEADER.pack(self.idx_sig, len(self.r), len(sig_ots[0]), len(sig_ots), len(auth))
+        return header + bytes(self.r) + b''.join(sig_ots + auth)
+
+    @staticmethod
+    def fromBytes(data):
+        idx_sig, r_len, n, len_ots, len_auth = SIG_HEADER.unpack_from(data)
+        offset = SIG_HEADER.size + r_len
+        nodes = readNodes(data, offset, n, len_ots + len_auth)
+        sig = SigWithAuthPath(nodes[:len_ots], nodes[len_ots:])
+        return SigXMSS(idx_sig, bytearray(data[SIG_HEADER.size:offset]), sig)
+
+    def __reduce__(self):
+        return SigXMSS.fromBytes, (self.toBytes(),)
+
+
+class SigXMSSMT:
+    # Pickled as its encoding: index, length of r, node length, number of WOTS and authentication nodes per layer,
+    # number of layers, then r and the nodes layer by layer
+
+    def __init__(self, idx_sig, r, sigs):
+        self.idx_sig = idx_sig
+        self.r = r
+        self.sigs = sigs
+
+    def toBytes(self):
+        sig_ots, auth = self.sigs[0].sig_ots, self.sigs[0].auth
+        header = SIG_MT_HEADER.pack(
+            self.idx_sig, len(self.r), len(sig_ots[0]), len(sig_ots), len(auth), len(self.sigs)
+        )
+        return header + bytes(self.r) + b''.join(b''.join(sig.sig_ots + sig.auth) for sig in self.sigs)
+
+    @staticmethod
+    def fromBytes(data):
+        idx_sig, r_len, n, len_ots, len_auth, d = SIG_MT_HEADER.unpack_from(data)
+        offset = SIG_MT_HEADER.size + r_len
+        nodes = readNodes(data, offset, n, d * (len_ots + len_auth))
+        sigs = []
+        for layer in range(d):
+            layer_nodes = nodes[layer * (len_ots + len_auth):(layer + 1) * (len_ots + len_auth)]
+            sigs.append(SigWithAuthPath(layer_nodes[:len_ots], layer_nodes[len_ots:]))
+        return SigXMSSMT(idx_sig, bytearray(data[SIG_MT_HEADER.size:offset]), sigs)
+
+    def __reduce__(self):
+        return SigXMSSMT.fromBytes, (self.toBytes(),)
+
+
+def readNodes(data, offset, n, count):
+    return [bytearray(data[offset + i * n:offset + (i + 1) * n]) for i in range(count)]
 
 
 class SigWithAuthPath:
@@ -39,54 +226,56 @@ class SigWithAuthPath:
 
 
 class ADRS:
+    # The 32 bytes of the address in one buffer: layer, tree (8 bytes), type, three words that depend on the type, and
+    # the key and mask word, each field is written in place
+
+    __slots__ = ('buffer',)
 
     def __init__(self):
-        self.layerAddress = bytes(4)
-        self.treeAddress = bytes(8)
-        self.type = bytes(4)
+        self.buffer = bytearray(32)
 
-        self.first_word = bytes(4)
-        self.second_word = bytes(4)
-        self.third_word = bytes(4)
+    @property
+    def view(self):
+        # The address bytes without copying them, for hashing
+        return memoryview(self.buffer)
 
-        self.keyAndMask = bytes(4)
+    @property
+    def keyAndMask(self):
+        return bytes(self.buffer[28:])
 
     def setType(self, type_value):
-        self.type = type_value.to_bytes(4, byteorder='big')
-        self.first_word = bytearray(4)
-        self.second_word = bytearray(4)
-        self.third_word = bytearray(4)
-        self.keyAndMask = bytearray(4)
+        WORD.pack_into(self.buffer, 12, type_value)
+        self.buffer[16:] = ZERO
 
     def getTreeHeight(self):
-        return self.second_word
+        return WORD.unpack_from(self.buffer, 20)[0]
 
     def getTreeIndex(self):
-        return self.third_word
+        return WORD.unpack_from(self.buffer, 24)[0]
 
     def setHashAddress(self, value):
-        self.third_word = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 24, value)
 
     def setKeyAndMask(self, value):
-        self.keyAndMask = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 28, value)
 
     def setChainAddress(self, value):
-        self.second_word = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 20, value)
 
     def setTreeHeight(self, value):
-        self.second_word = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 20, value)
 
     def setTreeIndex(self, value):
-        self.third_word = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 24, value)
 
     def setOTSAddress(self, value):
-        self.first_word = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 16, value)
 
     def setLTreeAddress(self, value):
-        self.first_word = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 16, value)
 
     def setLayerAddress(self, value):
-        self.layerAddress = value.to_bytes(4, byteorder='big')
+        WORD.pack_into(self.buffer, 0, value)
 
     def setTreeAddress(self, value):
-        self.treeAddress = value.to_bytes(4, byteorder='big')
+        DOUBLE_WORD.pack_into(self.buffer, 4, value)
@@ -1,22 +1,18 @@
 from .utils import *
 
 
-def WOTS_genSK(length, n):
+def WOTS_deriveSK(SK_SEED, length, n, address, hasher):
     secret_key = [bytes()] * length
 
     for i in range(length):
-        SEED = generate_random_value(length)
-
-        secret_key[i] = pseudorandom_function(SEED, n)
+        address.setChainAddress(i)
+        secret_key[i] = PRF_keygen(SK_SEED, address.view, n, hasher)
 
     return secret_key
 
 
 def WOTS_genPK(private_key: [bytes], length: int, w: int in {4, 16}, SEED, address, hasher):
-    public_key = [bytes()] * length
-    for i in range(length):
-        address.setChainAddress(i)
-        public_key[i] = chain(private_key[i], 0, w - 1, SEED, address, w, hasher)
+    public_key = chains(private_key, [0] * length, [w - 1] * length, SEED, address, w, hasher)
 
     return public_key
 
@@ -24,7 +20,7 @@ def WOTS_genPK(private_key: [bytes], length: int, w: int in {4, 16}, SEED, addre
 def WOTS_sign(message: bytes, private_key: [bytes], w: int in {4, 16}, SEED, address, hasher):
     checksum = 0
 
-    n = len(message) // 2
+    n = len(message) if binary(hasher) else len(message) // 2
     len_1, len_2, len_all = compute_lengths(n, w)
 
     msg = base_w(message, w, len_1)
@@ -38,11 +34,7 @@ def WOTS_sign(message: bytes, private_key: [bytes], w: int in {4, 16}, SEED, add
 
     msg.extend(base_w(to_byte(checksum, len_2_bytes), w, len_2))
 
-    signature = [bytes()] * len_all
-
-    for i in range(0, len_all):
-        address.setChainAddress(i)
-        signature[i] = chain(private_key[i], 0, msg[i], SEED, address, w, hasher)
+    signature = chains(private_key, [0] * len_all, msg, SEED, address, w, hasher)
 
     return signature
 
@@ -50,7 +42,7 @@ def WOTS_sign(message: bytes, private_key: [bytes], w: int in {4, 16}, SEED, add
 def WOTS_pkFromSig(message: bytes, signature: [bytes], w: int in {4, 16}, address, SEED, hasher):
     checksum = 0
 
-    n = len(message) // 2
+    n = len(message) if binary(hasher) else len(message) // 2
     len_1, len_2, len_all = compute_lengths(n, w)
 
     msg = base_w(message, w, len_1)
@@ -64,10 +56,6 @@ def WOTS_pkFromSig(message: bytes, signature: [bytes], w: int in {4, 16}, addres
 
     msg.extend(base_w(to_byte(checksum, len_2_bytes), w, len_2))
 
-    tmp_pk = [bytes()] * len_all
-
-    for i in range(0, len_all):
-        address.setChainAddress(i)
-        tmp_pk[i] = chain(signature[i], msg[i], w - 1 - msg[i], SEED, address, w, hasher)
+    tmp_pk = chains(signature, msg, [w - 1 - m for m in msg], SEED, address, w, hasher)
 
     return tmp_pk
@@ -3,6 +3,7 @@ Code taken from: https://github.com/lothar1998/XMSS-tree
 """
 from .WOTS import *
 from typing import List
+from concurrent.futures import ProcessPoolExecutor
 from .DataStructure import *
 
 
@@ -19,13 +20,32 @@ def ltree(pk: List[bytearray], address: ADRS, SEED: str, length: int, hasher) ->
 
         length = ceil(length / 2)
         height = address.getTreeHeight()
-        height = int.from_bytes(height, byteorder='big')
         address.setTreeHeight(height + 1)
 
     return pk[0]
 
 
-def treeHash(SK: XMSSPrivateKey, s: int, t: int, address: ADRS, w: int in {4, 16}, length_all: int, hasher) -> bytearray:
+def wotsSK(SK: XMSSPrivateKey, i: int, length_all: int, hasher) -> List[bytearray]:
+    # The WOTS secret key of a leaf is derived from the secret seed and the address of its chains, so it is not stored
+    address = ADRS()
+    address.setLayerAddress(SK.layer)
+    address.setTreeAddress(SK.tree)
+    address.setType(0)
+    address.setOTSAddress(i)
+    return WOTS_deriveSK(SK.SK_SEED, length_all, len(SK.SEED), address, hasher)
+
+
+def leafNode(SK: XMSSPrivateKey, i: int, address: ADRS, w: int in {4, 16}, length_all: int, hasher) -> bytearray:
+    SEED = SK.SEED
+    address.setType(0)
+    address.setOTSAddress(i)
+    pk = WOTS_genPK(wotsSK(SK, i, length_all, hasher), length_all, w, SEED, address, hasher)
+    address.setType(1)
+    address.setLTreeAddress(i)
+    return ltree(pk, address, SEED, length_all, hasher)
+
+
+def treeHash(SK: XMSSPrivateKey, s: int, t: int, address: ADRS, w: int in {4, 16}, length_all: int, hasher, nodes: dict = None) -> bytearray:
 
     class StackElement:
         def __init__(self, node_value=None, height=None):
@@ -39,59 +59,106 @@ def treeHash(SK: XMSSPrivateKey, s: int, t: int, address: ADRS, w: int in {4, 16
 
     for i in range(0, int(pow(2, t))):
         SEED = SK.SEED
-        address.setType(0)
-        address.setOTSAddress(s + i)
-        pk = WOTS_genPK(SK.wots_private_keys[s + i], length_all, w, SEED, address, hasher)
-        address.setType(1)
-        address.setLTreeAddress(s + i)
-        node = ltree(pk, address, SEED, length_all, hasher)
+        node = leafNode(SK, s + i, address, w, length_all, hasher)
 
         node_as_stack_element = StackElement(node, 0)
+        if nodes is not None:
+            nodes[(0, s + i)] = node
 
         address.setType(2)
         address.setTreeHeight(0)
         address.setTreeIndex(i + s)
 
         while len(Stack) != 0 and Stack[len(Stack) - 1].height == node_as_stack_element.height:
-            address.setTreeIndex(int((int.from_bytes(address.getTreeHeight(), byteorder='big') - 1) / 2))
+            address.setTreeIndex(int((address.getTreeHeight() - 1) / 2))
 
             previous_height = node_as_stack_element.height
 
             node = RAND_HASH(Stack.pop().node_value, node_as_stack_element.node_value, SEED, address, hasher)
 
             node_as_stack_element = StackElement(node, previous_height + 1)
+            if nodes is not None:
+                nodes[(previous_height + 1, (s + i) >> (previous_height + 1))] = node
 
-            address.setTreeHeight(int.from_bytes(address.getTreeHeight(), byteorder='big') + 1)
+            address.setTreeHeight(address.getTreeHeight() + 1)
 
         Stack.append(node_as_stack_element)
 
     return Stack.pop().node_value
 
 
-def XMSS_keyGen(n, w, h, hasher) -> XMSSKeypair:
+def subtreeHash(SK: XMSSPrivateKey, s: int, t: int, w: int in {4, 16}, length_all: int, hasher, keep: bool) -> (bytearray, dict):
+    # Runs in a worker process, the pickled SK holds only the seeds
+    nodes = {} if keep else None
+    root = treeHash(SK, s, t, ADRS(), w, length_all, hasher, nodes)
+    return root, nodes
+
+
+def parallelTreeHash(SK: XMSSPrivateKey, h: int, w: int in {4, 16}, length_all: int, hasher, nodes, workers: int) -> bytearray:
+    # Splits the leaves into at least as many subtrees as workers, hashes them in worker processes and merges their
+    # roots up to the root of the tree
+    k = min(h, (workers - 1).bit_length())
+    t = h - k
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = []
+        for i in range(1 << k):
+            futures.append(executor.submit(subtreeHash, SK, i << t, t, w, length_all, hasher, nodes is not None))
+
+        level = []
+        for future in futures:
+            root, subtree = future.result()
+            level.append(root)
+            if nodes is not None:
+                for key, node in subtree.items():
+                    nodes[key] = node
+
+    address = ADRS()
+    address.setType(2)
+    for j in range(t, h):
+        address.setTreeHeight(j)
+        for i in range(len(level) // 2):
+            address.setTreeIndex(i)
+            level[i] = RAND_HASH(level[2 * i], level[2 * i + 1], SK.SEED, address, hasher)
+            if nodes is not None:
+                nodes[(j + 1, i)] = level[i]
+        del level[len(level) // 2:]
+
+    return level[0]
+
+
+def XMSS_keyGen(n, w, h, hasher, traversal: int = 0, store: NodeStore = None, workers: int = None) -> XMSSKeypair:
     n //= 2
     len_1, len_2, len_all = compute_lengths(n, w)
-    wots_sk = []
-    for i in range(0, 2 ** h):
-        wots_sk.append(WOTS_genSK(len_all, n))
 
     SK = XMSSPrivateKey()
     PK = XMSSPublicKey()
     idx = 0
 
-    SK.SK_PRF = generate_random_value(n)
-    SEED = generate_random_value(n)
+    SK.SK_PRF = generate_key(n, hasher)
+    SEED = generate_key(n, hasher)
     SK.SEED = SEED
-    SK.wots_private_keys = wots_sk
+    SK.SK_SEED = generate_key(n, hasher)
 
     adrs = ADRS()
 
-    root = treeHash(SK, 0, h, adrs, w, len_all, hasher)
+    # The traversal keeps the nodes of the tree until it knows the first leaf to sign, the node store keeps them all
+    nodes = store if store is not None else {} if traversal else None
+    if workers is not None and workers > 1:
+        root = parallelTreeHash(SK, h, w, len_all, hasher, nodes, workers)
+    else:
+        root = treeHash(SK, 0, h, adrs, w, len_all, hasher, nodes)
 
     SK.idx = idx
     SK.root_value = root
-
-    PK.OID = generate_random_value(n)
+    if store is not None:
+        store.flush()
+        SK.nodes = store
+    if traversal:
+        SK.bds = BDSState(h, traversal)
+        SK.bds.nodes = nodes
+
+    PK.OID = generate_key(n, hasher)
     PK.root_value = root
     PK.SEED = SEED
 
@@ -107,11 +174,95 @@ def buildAuth(SK: XMSSPrivateKey, index: int, address: ADRS, w: int in {4, 16},
     return auth
 
 
+def bdsIndex(state: BDSState, height: int, index: int) -> int:
+    # Maps the node index in the order of the traversal to the index in the tree and back
+    if state.direction > 0:
+        return index
+    return (1 << (state.h - height)) - 1 - index
+
+
+def bdsInit(SK: XMSSPrivateKey, leaf: int, address: ADRS, w: int in {4, 16}, length_all: int, h: int, hasher):
+    # One pass over the whole tree gives the authentication path of the leaf and the nodes needed next on each level
+    state = SK.bds
+    nodes = state.nodes
+    if nodes is None:
+        nodes = {}
+        treeHash(SK, 0, h, address, w, length_all, hasher, nodes)
+    state.nodes = None
+
+    v = bdsIndex(state, 0, leaf)
+    for j in range(h):
+        state.auth[j] = nodes[(j, bdsIndex(state, j, (v >> j) ^ 1))]
+        state.treehash[j] = None
+        if ((v >> j) + 1) << j < 1 << h:
+            instance = TreeHashInstance(j, bdsIndex(state, j, ((v >> j) + 1) ^ 1))
+            instance.node = nodes[(j, instance.index)]
+            state.treehash[j] = instance
+    state.leaf = leaf
+
+
+def bdsUpdate(SK: XMSSPrivateKey, instance: TreeHashInstance, address: ADRS, w: int in {4, 16}, length_all: int, hasher):
+    # Computes the next leaf of the subtree and merges it with the nodes of the same height on the stack
+    i = (instance.index << instance.height) + instance.next
+    node = leafNode(SK, i, address, w, length_all, hasher)
+    height = 0
+
+    address.setType(2)
+    while len(instance.stack) != 0 and instance.stack[-1][1] == height:
+        address.setTreeHeight(height)
+        address.setTreeIndex(i >> (height + 1))
+        node = RAND_HASH(instance.stack.pop()[0], node, SK.SEED, address, hasher)
+        height += 1
+
+    instance.stack.append((node, height))
+    instance.next += 1
+    if instance.next == 1 << instance.height:
+        instance.node = instance.stack.pop()[0]
+
+
+def bdsRound(SK: XMSSPrivateKey, address: ADRS, w: int in {4, 16}, length_all: int, h: int, hasher):
+    # Moves the traversal to the next leaf, each level does at most one leaf computation
+    state = SK.bds
+    v = bdsIndex(state, 0, state.leaf) + 1
+    if v >= 1 << h:
+        state.leaf = None
+        return
+
+    for j in range(h):
+        if v % (1 << j) != 0:
+            continue
+        instance = state.treehash[j]
+        while instance.node is None:
+            bdsUpdate(SK, instance, address, w, length_all, hasher)
+        state.auth[j] = instance.node
+        state.treehash[j] = None
+        if ((v >> j) + 1) << j < 1 << h:
+            state.treehash[j] = TreeHashInstance(j, bdsIndex(state, j, ((v >> j) + 1) ^ 1))
+
+    for instance in state.treehash:
+        if instance is not None and instance.node is None:
+            bdsUpdate(SK, instance, address, w, length_all, hasher)
+    state.leaf = bdsIndex(state, 0, v)
+
+
+def bdsAuth(SK: XMSSPrivateKey, index: int, address: ADRS, w: int in {4, 16}, length_all: int, h: int, hasher) -> List[bytearray]:
+    if SK.bds.leaf is None:
+        bdsInit(SK, index, address, w, length_all, h, hasher)
+    auth = list(SK.bds.auth)
+    bdsRound(SK, address, w, length_all, h, hasher)
+    return auth
+
+
 def treeSig(message: bytearray, SK: XMSSPrivateKey, address: ADRS, w: int in {4, 16}, length_all: int, idx_sig: int, h: int, hasher) -> SigWithAuthPath:
-    auth = buildAuth(SK, idx_sig, address, w, length_all, h, hasher)
+    if getattr(SK, 'nodes', None) is not None:
+        auth = [SK.nodes[(j, (idx_sig >> j) ^ 1)] for j in range(h)]
+    elif getattr(SK, 'bds', None) is not None and SK.bds.leaf in {None, idx_sig}:
+        auth = bdsAuth(SK, idx_sig, address, w, length_all, h, hasher)
+    else:
+        auth = buildAuth(SK, idx_sig, address, w, length_all, h, hasher)
     address.setType(0)
     address.setOTSAddress(idx_sig)
-    sig_ots = WOTS_sign(message, SK.wots_private_keys[idx_sig], w, SK.SEED, address, hasher)
+    sig_ots = WOTS_sign(message, wotsSK(SK, idx_sig, length_all, hasher), w, SK.SEED, address, hasher)
     Sig = SigWithAuthPath(sig_ots, auth)
     return Sig
 
@@ -121,20 +272,22 @@ def XMSS_sign(message: bytearray, SK: XMSSPrivateKey, w: int in {4, 16}, address
     len_1, len_2, length_all = compute_lengths(n, w)
     idx_sig = SK.idx
     SK.idx = idx_sig + 1
-    r = PRF_XMSS(SK.SK_PRF, to_byte(idx_sig, 4), len_1, hasher)
+    # The binary-native digests are n bytes long, the hexadecimal ones len_1 characters
+    m_len = n if binary(hasher) else len_1
+    r = PRF_XMSS(SK.SK_PRF, to_byte(idx_sig, 4), m_len, hasher)
     arrayOfBytes = bytearray()
     arrayOfBytes.extend(r)
     arrayOfBytes.extend(SK.root_value)
-    arrayOfBytes.extend(bytearray(int_to_bytes(idx_sig, n)))
-    M2 = H_msg(arrayOfBytes, message, len_1, hasher)
+    arrayOfBytes.extend(bytearray(to_byte(idx_sig, n) if binary(hasher) else int_to_bytes(idx_sig, n)))
+    M2 = H_msg(arrayOfBytes, message, m_len, hasher)
 
     value = treeSig(M2, SK, address, w, length_all, idx_sig, h, hasher)
 
-    return SigXMSS(idx_sig, r, value, SK, M2)
+    return SigXMSS(idx_sig, r, value)
 
 
 def XMSS_rootFromSig(idx_sig: int, sig_ots, auth: List[bytearray], message: bytearray, h: int, w: int in {4, 16}, SEED, address: ADRS, hasher):
-    n = len(message) // 2
+    n = len(message) if binary(hasher) else len(message) // 2
     len_1, len_2, length_all = compute_lengths(n, w)
 
     address.setType(0)
@@ -150,10 +303,10 @@ def XMSS_rootFromSig(idx_sig: int, sig_ots, auth: List[bytearray], message: byte
     for k in range(0, h):
         address.setTreeHeight(k)
         if floor(idx_sig / (2 ** k)) % 2 == 0:
-            address.setTreeIndex(int.from_bytes(address.getTreeIndex(), byteorder='big') // 2)
+            address.setTreeIndex(address.getTreeIndex() // 2)
             node[1] = RAND_HASH(node[0], auth[k], SEED, address, hasher)
         else:
-            address.setTreeIndex((int.from_bytes(address.getTreeIndex(), byteorder='big') - 1) // 2)
+            address.setTreeIndex((address.getTreeIndex() - 1) // 2)
             node[1] = RAND_HASH(auth[k], node[0], SEED, address, hasher)
 
         node[0] = node[1]
@@ -169,9 +322,9 @@ def XMSS_verify(Sig: SigXMSS, M: bytearray, PK: XMSSPublicKey, w: int in {4, 16}
     arrayOfBytes = bytearray()
     arrayOfBytes.extend(Sig.r)
     arrayOfBytes.extend(PK.root_value)
-    arrayOfBytes.extend(bytearray(int_to_bytes(Sig.idx_sig, n)))
+    arrayOfBytes.extend(bytearray(to_byte(Sig.idx_sig, n) if binary(hasher) else int_to_bytes(Sig.idx_sig, n)))
 
-    M2 = H_msg(arrayOfBytes, M, len_1, hasher)
+    M2 = H_msg(arrayOfBytes, M, n if binary(hasher) else len_1, hasher)
 
     node = XMSS_rootFromSig(Sig.idx_sig, Sig.sig.sig_ots, Sig.sig.auth, M2, height, w, SEED, address, hasher)
 
@@ -179,3 +332,29 @@ def XMSS_verify(Sig: SigXMSS, M: bytearray, PK: XMSSPublicKey, w: int in {4, 16}
         return True
     else:
         return False
+
+
+def XMSS_disclose(SK) -> bytes:
+    # The index and the secret seeds are enough to sign with the key again, the rest is in the public key
+    text = isinstance(SK.SK_SEED, str)
+    seeds = [seed.encode() if text else bytes(seed) for seed in (SK.SK_SEED, SK.SK_PRF)]
+    return DISCLOSURE.pack(SK.idx, text, len(seeds[0])) + b''.join(seeds)
+
+
+def XMSS_recover(data: bytes, PK: XMSSPublicKey):
+    idx, text, n = DISCLOSURE.unpack_from(data)
+    seeds = [data[DISCLOSURE.size + i * n:DISCLOSURE.size + (i + 1) * n] for i in range(2)]
+    if text:
+        seeds = [seed.decode() for seed in seeds]
+
+    if isinstance(PK, XMSSMTPublicKey):
+        SK = XMSSMTPrivateKey()
+        SK.d = PK.d
+    else:
+        SK = XMSSPrivateKey()
+    SK.idx = idx
+    SK.SK_SEED, SK.SK_PRF = seeds
+    SK.SEED = PK.SEED
+    SK.root_value = PK.root_value
+
+    return SK
@@ -0,0 +1,115 @@
+from .XMSS import *
+
+
+def XMSSMT_subtree(SK: XMSSMTPrivateKey, layer: int, tree: int, w: int in {4, 16}, h: int, hasher) -> (XMSSPrivateKey, SigWithAuthPath):
+    # Gives the subtree and the signature of its root by the parent subtree, one subtree per layer is kept, so a
+    # subtree is derived once for the 2^h signatures that use it
+    if SK.trees is None:
+        SK.trees = {}
+    cached = SK.trees.get(layer)
+    if cached is not None and cached[0] == tree:
+        return cached[1], cached[2]
+
+    n = len(SK.SEED)
+    len_1, len_2, length_all = compute_lengths(n, w)
+
+    sk = XMSSPrivateKey()
+    sk.SEED = SK.SEED
+    sk.SK_PRF = SK.SK_PRF
+    sk.SK_SEED = SK.SK_SEED
+    sk.layer = layer
+    sk.tree = tree
+    sk.nodes = NodeStore(h)
+
+    address = ADRS()
+    address.setLayerAddress(layer)
+    address.setTreeAddress(tree)
+    sk.root_value = treeHash(sk, 0, h, address, w, length_all, hasher, sk.nodes)
+
+    sig = None
+    if layer < SK.d - 1:
+        parent, _ = XMSSMT_subtree(SK, layer + 1, tree >> h, w, h, hasher)
+        address = ADRS()
+        address.setLayerAddress(layer + 1)
+        address.setTreeAddress(tree >> h)
+        sig = treeSig(sk.root_value, parent, address, w, length_all, tree % (1 << h), h, hasher)
+
+    SK.trees[layer] = (tree, sk, sig)
+    return sk, sig
+
+
+def XMSSMT_keyGen(n, w, h, d, hasher) -> XMSSKeypair:
+    if h % d != 0:
+        raise ValueError("should be h % d == 0")
+
+    n //= 2
+
+    SK = XMSSMTPrivateKey()
+    PK = XMSSMTPublicKey()
+
+    SK.d = d
+    SK.SK_PRF = generate_key(n, hasher)
+    SK.SK_SEED = generate_key(n, hasher)
+    SEED = generate_key(n, hasher)
+    SK.SEED = SEED
+
+    # Only the top subtree is derived now, the lower ones when the first index under them is signed
+    top, _ = XMSSMT_subtree(SK, d - 1, 0, w, h // d, hasher)
+    SK.root_value = top.root_value
+
+    PK.OID = generate_key(n, hasher)
+    PK.root_value = top.root_value
+    PK.SEED = SEED
+    PK.d = d
+
+    return SK, PK
+
+
+def XMSSMT_sign(message: bytearray, SK: XMSSMTPrivateKey, w: int in {4, 16}, address: ADRS, h: int, hasher) -> SigXMSSMT:
+    n = len(message) // 2
+    len_1, len_2, length_all = compute_lengths(n, w)
+    h_sub = h // SK.d
+
+    idx_sig = SK.idx
+    SK.idx = idx_sig + 1
+    m_len = n if binary(hasher) else len_1
+    r = PRF_XMSS(SK.SK_PRF, to_byte(idx_sig, 4), m_len, hasher)
+    arrayOfBytes = bytearray()
+    arrayOfBytes.extend(r)
+    arrayOfBytes.extend(SK.root_value)
+    arrayOfBytes.extend(bytearray(to_byte(idx_sig, n) if binary(hasher) else int_to_bytes(idx_sig, n)))
+    M2 = H_msg(arrayOfBytes, message, m_len, hasher)
+
+    # The bottom subtree signs the message, every other subtree signs the root of the one below it
+    sk, _ = XMSSMT_subtree(SK, 0, idx_sig >> h_sub, w, h_sub, hasher)
+    address.setLayerAddress(0)
+    address.setTreeAddress(idx_sig >> h_sub)
+    sigs = [treeSig(M2, sk, address, w, length_all, idx_sig % (1 << h_sub), h_sub, hasher)]
+    for layer in range(SK.d - 1):
+        _, sig = XMSSMT_subtree(SK, layer, idx_sig >> (h_sub * (layer + 1)), w, h_sub, hasher)
+        sigs.append(sig)
+
+    return SigXMSSMT(idx_sig, r, sigs)
+
+
+def XMSSMT_verify(Sig: SigXMSSMT, M: bytearray, PK: XMSSMTPublicKey, w: int in {4, 16}, SEED, height: int, hasher):
+    n = len(M) // 2
+    len_1, len_2, length_all = compute_lengths(n, w)
+    h_sub = height // PK.d
+
+    arrayOfBytes = bytearray()
+    arrayOfBytes.extend(Sig.r)
+    arrayOfBytes.extend(PK.root_value)
+    arrayOfBytes.extend(bytearray(to_byte(Sig.idx_sig, n) if binary(hasher) else int_to_bytes(Sig.idx_sig, n)))
+
+    node = H_msg(arrayOfBytes, M, n if binary(hasher) else len_1, hasher)
+
+    idx = Sig.idx_sig
+    for layer, sig in enumerate(Sig.sigs):
+        address = ADRS()
+        address.setLayerAddress(layer)
+        address.setTreeAddress(idx >> h_sub)
+        node = XMSS_rootFromSig(idx % (1 << h_sub), sig.sig_ots, sig.auth, node, h_sub, w, SEED, address, hasher)
+        idx >>= h_sub
+
+    return len(Sig.sigs) == PK.d and idx == 0 and node == PK.root_value
@@ -1,8 +1,40 @@
-from random import choice, seed, randint
+from random import choice
 from string import ascii_letters, digits
 from math import floor, log2, log, ceil
+from functools import lru_cache
+from os import urandom
 from .DataStructure import ADRS
 
+PRF_CACHE_SIZE = 1 << 12
+""" Amount of distinct PRF inputs whose outputs are kept """
+
+
+class Raw:
+    # Selects the binary-native variant, a compact variant that does not follow RFC 8391: the functions hash raw
+    # bytes prefixed by toByte(i, n) in the manner of the RFC, but n is half the digest size (16 bytes with SHA-256)
+    # and the PRF hashes only the key-and-mask word of the address, as in the hexadecimal variant, so its outputs do
+    # not match the RFC test vectors. The nodes carry the same amount of digest in half the bytes of the hexadecimal
+    # ones
+
+    binary = True
+
+    def __init__(self, hasher):
+        self.hasher = hasher
+
+    def __call__(self, data=b''):
+        return self.hasher(data)
+
+
+def binary(hasher):
+    return getattr(hasher, 'binary', False)
+
+
+def generate_key(n, hasher):
+    # SEED and PRF keys, n random bytes in the binary-native variant and n letters otherwise
+    if binary(hasher):
+        return urandom(n)
+    return ''.join(choice(ascii_letters + digits) for _ in range(n))
+
 
 def base_w(byte_string: bytes, w: int in {4, 16}, out_len):
     in_ = 0
@@ -21,12 +53,6 @@ def base_w(byte_string: bytes, w: int in {4, 16}, out_len):
     return base_w_
 
 
-def generate_random_value(n):
-    alphabet = ascii_letters + digits
-    value = ''.join(choice(alphabet) for _ in range(n))
-    return value
-
-
 def compute_needed_bytes(n):
     if n == 0:
         return 1
@@ -61,6 +87,8 @@ def int_to_bytes(val, count):
 
 def F(KEY, M, hasher):
     key_len = len(KEY)
+    if binary(hasher):
+        return bytearray(hasher(to_byte(0, key_len) + KEY + M).digest()[:key_len])
     toBytes = to_byte(0, 4)
     help_ = hasher(toBytes + KEY + M).hexdigest()[:key_len]
     out = bytearray()
@@ -74,30 +102,94 @@ def chain(X, i, s, SEED, address, w, hasher):
         return X
     if (i + s) > (w - 1):
         return None
-    tmp = chain(X, i, s - 1, SEED, address, w, hasher)
 
     address.setHashAddress((i + s - 1))
-    address.setKeyAndMask(0)
-    KEY = PRF(SEED, address, hasher)
-    address.setKeyAndMask(1)
-    BM = PRF(SEED, address, hasher)
-    tmp = F(KEY, xor(tmp, BM), hasher)
-    return tmp
+    return walk(X, s, *chainKey(SEED, hasher), hasher)
+
+
+def chains(X, starts, steps, SEED, address, w, hasher):
+    # Advances all the chains of a WOTS key at once, chain c by steps[c] from position starts[c]
+    key = chainKey(SEED, hasher)
+    out = [bytes()] * len(X)
+
+    for c in range(len(X)):
+        if steps[c] == 0:
+            out[c] = X[c]
+        elif (starts[c] + steps[c]) <= (w - 1):
+            address.setChainAddress(c)
+            address.setHashAddress(starts[c] + steps[c] - 1)
+            out[c] = walk(X[c], steps[c], *key, hasher)
+        else:
+            out[c] = None
+
+    return out
+
+
+def walk(X, s, prefix, mask, n, hasher):
+    # s steps of F(KEY, X xor BM) in a flat loop, the xor is done on integers
+    tmp = X
+    if binary(hasher):
+        for _ in range(s):
+            tmp = hasher(prefix + (int.from_bytes(tmp, 'big') ^ mask).to_bytes(n, 'big')).digest()[:n]
+        return bytearray(tmp)
+    for _ in range(s):
+        tmp = hasher(prefix + (int.from_bytes(tmp, 'big') ^ mask).to_bytes(n, 'big')).hexdigest()[:n].encode()
+    return bytearray(tmp)
+
+
+@lru_cache(maxsize=PRF_CACHE_SIZE)
+def chainKey(SEED: str, hasher) -> (bytes, int, int):
+    # The hashed prefix of F and the bitmask as an integer, so a chain step is one xor and one hash call
+    KEY, BM, _ = masks(SEED, hasher)
+    toBytes = to_byte(0, len(KEY) if binary(hasher) else 4)
+    return bytes(toBytes + KEY), int.from_bytes(BM, 'big'), len(BM)
 
 
 def PRF(KEY: str, M: ADRS, hasher) -> bytearray:
-    toBytes = to_byte(3, 4)
+    return _PRF(KEY, M.keyAndMask, hasher)
+
+
+@lru_cache(maxsize=PRF_CACHE_SIZE)
+def _PRF(KEY: str, M: bytes, hasher) -> bytearray:
+    # Keyed on the full hashed input, so it stays correct if more of the address is hashed
     key_len = len(KEY)
+    if binary(hasher):
+        return bytearray(hasher(to_byte(3, key_len) + KEY + M).digest()[:key_len])
+    toBytes = to_byte(3, 4)
     KEY2 = bytearray()
     KEY2.extend(map(ord, KEY))
-    help_ = hasher(toBytes + KEY2 + M.keyAndMask).hexdigest()[:key_len*2]
+    help_ = hasher(toBytes + KEY2 + M).hexdigest()[:key_len*2]
     out = bytearray()
     out.extend(map(ord, help_))
     return out
 
 
+@lru_cache(maxsize=PRF_CACHE_SIZE)
+def masks(SEED: str, hasher) -> (bytearray, bytearray, bytearray):
+    # PRF only hashes the key and mask word of the address, so a SEED has just three outputs, the key and the two
+    # bitmasks, which the callers must not modify
+    address = ADRS()
+    KEY = PRF(SEED, address, hasher)
+    address.setKeyAndMask(1)
+    BM_0 = PRF(SEED, address, hasher)
+    address.setKeyAndMask(2)
+    BM_1 = PRF(SEED, address, hasher)
+    return KEY, BM_0, BM_1
+
+
+def PRF_keygen(KEY, M, n: int, hasher) -> bytearray:
+    # Derives the secret values of the address M from the secret seed, n bytes of digest in either variant
+    if isinstance(KEY, str):
+        KEY = KEY.encode()
+    if binary(hasher):
+        return bytearray(hasher(to_byte(4, n) + KEY + M).digest()[:n])
+    return bytearray(hasher(to_byte(4, 4) + KEY + M).hexdigest()[:2 * n].encode())
+
+
 def H(KEY: bytearray, M: bytearray, hasher) -> bytearray:
     key_len = len(KEY)
+    if binary(hasher):
+        return bytearray(hasher(to_byte(1, key_len) + KEY + M).digest()[:key_len])
     toBytes = to_byte(1, 4)
     help_ = hasher(toBytes + KEY + M).hexdigest()[:key_len]
     out = bytearray()
@@ -106,6 +198,8 @@ def H(KEY: bytearray, M: bytearray, hasher) -> bytearray:
 
 
 def PRF_XMSS(KEY: str, M: bytearray, n: int, hasher) -> bytearray:
+    if binary(hasher):
+        return bytearray(hasher(to_byte(3, n) + KEY + M).digest()[:n])
     toBytes = to_byte(3, 4)
     KEY2 = bytearray()
     KEY2.extend(map(ord, KEY))
@@ -116,6 +210,8 @@ def PRF_XMSS(KEY: str, M: bytearray, n: int, hasher) -> bytearray:
 
 
 def H_msg(KEY: bytearray, M: bytearray, n: int, hasher) -> bytearray:
+    if binary(hasher):
+        return bytearray(hasher(to_byte(2, n) + KEY + M).digest()[:n])
     toBytes = to_byte(2, 4)
     help_ = hasher(toBytes + KEY + M).hexdigest()[:n]
     out = bytearray()
@@ -124,21 +220,7 @@ def H_msg(KEY: bytearray, M: bytearray, n: int, hasher) -> bytearray:
 
 
 def RAND_HASH(left: bytearray, right: bytearray, SEED: str, adrs: ADRS, hasher):
-    adrs.setKeyAndMask(0)
-    KEY = PRF(SEED, adrs, hasher)
-    adrs.setKeyAndMask(1)
-    BM_0 = PRF(SEED, adrs, hasher)
-    adrs.setKeyAndMask(2)
-    BM_1 = PRF(SEED, adrs, hasher)
+    KEY, BM_0, BM_1 = masks(SEED, hasher)
 
     return H(KEY, xor(left, BM_0) + xor(right, BM_1), hasher)
 
-
-def pseudorandom_function(SEED, n):
-    seed(SEED)
-    sk_element = list()
-    for i in range(n):
-        sign = randint(0, 255)
-        sk_element.append('{:02x}'.format(sign))
-
-    return bytearray(''.join(sk_element).encode(encoding='utf-8'))
@@ -1,5 +1,6 @@
-from src.schemes.ES.XMSStree.XMSS import XMSS_keyGen, XMSS_sign, XMSS_verify, ADRS
-from src.schemes.ES.XMSStree.DataStructure import XMSSPrivateKey, XMSSPublicKey
+from src.schemes.ES.XMSStree.XMSS import XMSS_keyGen, XMSS_sign, XMSS_verify, XMSS_disclose, XMSS_recover, ADRS
+from src.schemes.ES.XMSStree.XMSSMT import XMSSMT_keyGen, XMSSMT_sign, XMSSMT_verify
+from src.schemes.ES.XMSStree.DataStructure import XMSSPrivateKey, XMSSPublicKey, XMSSMTPrivateKey, XMSSMTPublicKey
 
 from .pebbling import PebbleState, random_value_factory, get_random_value, update
 from .enums.Seed import Seed
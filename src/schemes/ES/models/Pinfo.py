@@ -3,9 +3,11 @@ from typing import Callable  # Type hint
 from pickle import dumps  # Data to bytes
 
 from Crypto.PublicKey.RSA import RsaKey
+from Crypto.Hash.SHA512 import SHA512Hash, new as newSHA512
 
-from src.schemes.ES.XMSStree.DataStructure import XMSSPrivateKey, SigXMSS
+from src.schemes.ES.XMSStree.DataStructure import XMSSPrivateKey, XMSSMTPrivateKey, SigXMSS
 from src.schemes.ES.XMSStree.XMSS import XMSS_sign, ADRS
+from src.schemes.ES.XMSStree.XMSSMT import XMSSMT_sign
 from src.TLP.TimeLockPuzzle import TimeLockPuzzle
 
 
@@ -18,8 +20,8 @@ class Pinfo:
     """ Epoch number """
     r: (bytes, int)
     """ Random value and it's pebbling value """
-    SK_static_exp: XMSSPrivateKey
-    """ Expired static secret key """
+    SK_static_exp: bytes
+    """ Disclosure of the expired static secret key """
     tl: TimeLockPuzzle
     """ Time-lock puzzle with the new values """
 
@@ -34,18 +36,29 @@ class Pinfo:
     hasher: InitVar
     """ XMSS hasher """
 
+    _static_args: bytes = field(init=False, repr=False, compare=False, default=None)
+    """ Cached static arguments """
+    _dynamic_args: bytes = field(init=False, repr=False, compare=False, default=None)
+    """ Cached epoch part of the dynamic arguments """
+    _dynamic_prefix: SHA512Hash = field(init=False, repr=False, compare=False, default=None)
+    """ SHA-512 state after hashing the epoch part of the dynamic arguments """
+
     def __post_init__(self, sk_new: XMSSPrivateKey, w: int, h: int, hasher: Callable) -> None:
         """ The object signs itself after you get all the values """
-        self.SIG_static = XMSS_sign(hasher(self.static_args).digest(), sk_new, w, ADRS(), h, hasher)
+        sign_static: Callable = XMSSMT_sign if isinstance(sk_new, XMSSMTPrivateKey) else XMSS_sign
+        self.SIG_static = sign_static(hasher(self.static_args).digest(), sk_new, w, ADRS(), h, hasher)
 
     @property
     def params(self) -> ():
         """ Returns a tuple with important values """
         return self.PK_dynamic, self.e, self.r, self.SK_static_exp, self.tl, self.SIG_static
 
-    @property
-    def static_args(self) -> bytes:
-        """ Turns all the arguments into bytes """
+    def __getstate__(self) -> {}:
+        """ The cached encodings are left out, whoever gets the pinfo_e encodes the values it actually holds """
+        return {k: v for k, v in self.__dict__.items() if k not in {'_static_args', '_dynamic_args', '_dynamic_prefix'}}
+
+    def encode_static(self) -> bytes:
+        """ Turns the arguments of the static signature into bytes from the current values, to verify with """
         return dumps((
             self.PK_dynamic.export_key(),
             self.e,
@@ -54,14 +67,40 @@ class Pinfo:
             self.tl
         ))
 
-    def get_dynamic_args(self, m: str) -> bytes:
-        """ Turns the pinfo_e and the message into bytes and returns their concatenation """
+    def encode_dynamic(self) -> bytes:
+        """ Turns the pinfo_e into bytes from the current values, to verify with, the message is appended to them """
         return dumps((
             self.PK_dynamic.export_key(),
             self.e,
             self.r[0],
             self.SK_static_exp,
             self.tl,
-            self.SIG_static,
-            m.encode('ascii')
+            self.SIG_static
         ))
+
+    @property
+    def static_args(self) -> bytes:
+        """ Turns all the arguments into bytes, only once as the signer does not change its pinfo_e """
+        if self._static_args is None:
+            self._static_args = self.encode_static()
+        return self._static_args
+
+    @property
+    def dynamic_args(self) -> bytes:
+        """ Turns the pinfo_e into bytes, only once as the signer does not change it, the message follows them """
+        if self._dynamic_args is None:
+            self._dynamic_args = self.encode_dynamic()
+        return self._dynamic_args
+
+    def get_dynamic_args(self, m: str) -> bytes:
+        """ Turns the current values of the pinfo_e and the message into bytes and returns their concatenation """
+        return self.encode_dynamic() + m.encode('ascii')
+
+    def get_dynamic_prefix(self) -> SHA512Hash:
+        """
+        Returns a copy of the SHA-512 state after hashing the pinfo_e, to be extended with the message. It is hashed
+        only once, so it is meant for the signer, the verification hashes the values it got with get_dynamic_args
+        """
+        if self._dynamic_prefix is None:
+            self._dynamic_prefix = newSHA512(self.dynamic_args)
+        return self._dynamic_prefix.copy()
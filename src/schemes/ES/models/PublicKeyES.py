@@ -19,6 +19,10 @@ class PublicKeyES:
     """ Number of epoch for which a signature is valid """
     SEC: int
     """ Security parameter """
+    variant: str = None
+    """ Key of the XMSS variant, the one of the security parameter if not given """
+    S: int = None
+    """ Squares per second of the machine that generated the key, the epoch puzzles are derived with it """
 
     @property
     def params(self) -> ():
@@ -1,10 +1,12 @@
-from dataclasses import dataclass  # Data encapsulation
+from dataclasses import dataclass, field  # Data encapsulation
+from concurrent.futures import Future  # Result of a background computation
 
 from Crypto.PublicKey.RSA import RsaKey
 
 from src.schemes.ES.models.PublicKeyES import PublicKeyES
 from src.schemes.ES.pebbling import PebbleState
 from src.schemes.ES.models.Pinfo import Pinfo
+from src.TLP.TimeLockPuzzle import PuzzleContext
 
 
 @dataclass(frozen=True)
@@ -22,6 +24,10 @@ class SecretKeyES:
     """ Secret dynamic key """
     pinfo_e: Pinfo
     """ Public information """
+    ctx: PuzzleContext = None
+    """ Time-lock puzzle context to lock all the epoch puzzles under one modulus """
+    next: Future = field(default=None, repr=False, compare=False)
+    """ Public info and secret key of the next epoch, prepared in the background by the pipelined evolve """
 
     @property
     def params(self) -> ():
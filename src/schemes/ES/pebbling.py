@@ -14,6 +14,8 @@ class PebbleState:
 
     pebbler: Generator = field(init=False)
     """ Get the next value from the reversed hash chain """
+    ahead: [Any] = field(init=False, default_factory=list)
+    """ Next value taken from the pebbler by peek, but not consumed yet """
     val: InitVar
     """ Initial value """
     update: InitVar
@@ -31,8 +33,16 @@ class PebbleState:
 
     def perform_update(self) -> Any:
         """ Updates the internal state if possible """
+        if self.ahead:
+            return self.ahead.pop()
         return next(self.pebbler)
 
+    def peek(self) -> Any:
+        """ Returns the next value without consuming it, the following update returns the same value """
+        if not self.ahead:
+            self.ahead.append(next(self.pebbler))
+        return self.ahead[0]
+
 
 def update(SK: XMSSPrivateKey) -> XMSSPrivateKey:
     """ Get the next XMSS key """
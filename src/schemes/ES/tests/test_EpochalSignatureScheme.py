@@ -1,4 +1,13 @@
-from src.schemes.ES.EpochalSignatureScheme import EpochalSignatureScheme
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from random import getrandbits, seed
+
+from src.schemes.SignatureScheme import generate, sign, verify
+from src.schemes.ES import EpochalSignatureScheme as ESModule
+from src.schemes.ES.EpochalSignatureScheme import EpochalSignatureScheme, BATCH_CHUNK
+from src.TLP import calibration
+from src.TLP.calibration import Profile
+from src.TLP.backends import default_backend
 
 SEC: int = [256]
 """ General security parameter """
@@ -98,3 +107,208 @@ def test_forgery_tlp():
             for i in range(V):
                 assert ES.Verify(PK, e + i, altSIG, M)
             assert not ES.Verify(PK, e + V, altSIG, M)
+
+
+def test_reuse_modulus():
+    """ Epoch puzzles share the modulus of the secret key context and the signatures stay valid and forgeable """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V, reuse_modulus=True)
+        for e in range(1, 3):
+            pinfo_e, SK = ES.Evolve(SK)
+            assert pinfo_e.tl.N == SK.ctx.N
+
+            SIG = ES.Sign(SK, M)
+            assert ES.Verify(PK, e, SIG, M)
+
+            altSIG = ES.AltSign(PK, pinfo_e, e, M, use_tl=True)
+            assert ES.Verify(PK, e, altSIG, M)
+
+
+def test_binary_variant():
+    """ Signatures of the binary-native XMSS variant are valid and forgeable """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V, variant=f'raw-{s}')
+        for e in range(1, 3):
+            pinfo_e, SK = ES.Evolve(SK)
+
+            SIG = ES.Sign(SK, M)
+            assert ES.Verify(PK, e, SIG, M)
+            assert not ES.Verify(PK, e, SIG, 'olleh')
+
+            altSIG = ES.AltSign(PK, pinfo_e, e, M, use_tl=True)
+            assert ES.Verify(PK, e, altSIG, M)
+
+
+def test_multi_tree():
+    """ Signatures of the multi-tree XMSS variant are valid and forgeable for more epochs than a single tree has """
+    E: int = 5000
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V, variant=f'mt-{s}')
+        for e in range(1, 3):
+            pinfo_e, SK = ES.Evolve(SK)
+            assert pinfo_e.SIG_static.idx_sig >= 1 << 10
+
+            SIG = ES.Sign(SK, M)
+            assert ES.Verify(PK, e, SIG, M)
+            assert not ES.Verify(PK, e, SIG, 'olleh')
+
+            altSIG = ES.AltSign(PK, pinfo_e, e, M, use_tl=True)
+            assert ES.Verify(PK, e, altSIG, M)
+
+
+def test_parallel_keygen():
+    """ Signatures are valid when the static key is generated by worker processes """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V, workers=2)
+        pinfo_e, SK = ES.Evolve(SK)
+
+        SIG = ES.Sign(SK, M)
+        assert ES.Verify(PK, 1, SIG, M)
+
+
+def test_dynamic_prefix():
+    """ Signing with the pre-hashed epoch info is the same as signing the epoch info followed by the message """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        pinfo_e, SK = ES.Evolve(SK)
+
+        SIG_dynamic, _ = ES.Sign(SK, M)
+        assert verify(pinfo_e.PK_dynamic, pinfo_e.get_dynamic_args(M), SIG_dynamic)
+        assert pinfo_e.get_dynamic_prefix() is not pinfo_e.get_dynamic_prefix()
+        assert ES.Verify(PK, 1, ES.Sign(SK, 'olleh'), 'olleh')
+
+
+
+def test_forgery_swapped_key():
+    """ A copy of a valid epoch info with another dynamic key is invalid, also with the encodings of the original """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        pinfo_e, SK = ES.Evolve(SK)
+        assert ES.Verify(PK, 1, ES.Sign(SK, M), M)
+        SK_forged, PK_forged = generate(pinfo_e.PK_dynamic.size_in_bits())
+
+        stale = copy(pinfo_e)
+        stale._static_args, stale._dynamic_args = pinfo_e.static_args, pinfo_e.dynamic_args
+        stale._dynamic_prefix = pinfo_e.get_dynamic_prefix()
+        for forged in [copy(pinfo_e), stale]:
+            forged.PK_dynamic = PK_forged
+            SIG_forged: bytes = sign(SK_forged, M.encode('ascii'), forged.get_dynamic_prefix())
+            assert not ES.Verify(PK, 1, (SIG_forged, forged), M)
+        assert copy(pinfo_e)._dynamic_prefix is None
+
+
+def test_verify_batch():
+    """ Batch verification gives the result of each signature, also with the dynamic signatures split in chunks """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        _, SK_other = ES.Gen(s, 1, E, V)
+        _, SK_other = ES.Evolve(SK_other)
+
+        batch = []
+        for e in range(1, 3):
+            pinfo_e, SK = ES.Evolve(SK)
+            batch += [(ES.Sign(SK, m), m) for m in ['hello', 'world', 'again']]
+        batch += [(ES.Sign(SK, M), 'olleh'), (ES.Sign(SK_other, M), M)]
+        expected: [bool] = [True] * 6 + [False] * 2
+
+        assert ES.VerifyBatch(PK, 2, batch) == expected
+        with ProcessPoolExecutor(2) as executor:
+            for chunk in [1, 2, BATCH_CHUNK]:
+                assert ES.VerifyBatch(PK, 2, batch, executor=executor, chunk=chunk) == expected
+        assert ES.VerifyBatch(PK, 1 + V, batch) == [False] * 3 + [True] * 3 + [False] * 2
+        assert ES.VerifyBatch(PK, 2, []) == []
+
+
+
+def test_verify_batch_swapped_key():
+    """ A copy of an epoch info with another dynamic key and the old encodings is not grouped with the original """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        pinfo_e, SK = ES.Evolve(SK)
+
+        forged = copy(pinfo_e)
+        forged._static_args, forged._dynamic_args = pinfo_e.static_args, pinfo_e.dynamic_args
+        forged._dynamic_prefix = pinfo_e.get_dynamic_prefix()
+        SK_forged, forged.PK_dynamic = generate(pinfo_e.PK_dynamic.size_in_bits())
+        SIG_forged = (sign(SK_forged, M.encode('ascii'), forged.get_dynamic_prefix()), forged)
+
+        for batch, expected in [
+            ([(ES.Sign(SK, M), M), (SIG_forged, M)], [True, False]),
+            ([(SIG_forged, M), (ES.Sign(SK, M), M)], [False, True])
+        ]:
+            assert ES.VerifyBatch(PK, 1, batch) == expected
+
+
+def test_pipelined_evolve():
+    """ The pipelined evolve swaps in the epochs prepared in the background up to the last one """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, 3, V)
+        for e in range(1, 4):
+            pinfo_e, SK = ES.Evolve(SK, pipelined=True)
+            assert (pinfo_e.e, SK.e, SK.pinfo_e) == (e, e, pinfo_e)
+            assert (SK.next is None) == (e == 3)
+
+            SIG = ES.Sign(SK, M)
+            assert ES.Verify(PK, e, SIG, M)
+
+            altSIG = ES.AltSign(PK, pinfo_e, e, M, use_tl=True)
+            assert ES.Verify(PK, e, altSIG, M)
+
+
+def test_forgery_other_host(monkeypatch):
+    """ Forged epoch infos lock their puzzles with the squaring speed of the key, not the one of the forging host """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        pinfo_e, SK = ES.Evolve(SK)
+
+        monkeypatch.setattr(calibration, 'PROFILE', Profile('other', {default_backend(): {s: (2.0 * PK.S, 0, 0)}}))
+        altSIG = ES.AltSign(PK, pinfo_e, 1, M, use_tl=True)
+        assert altSIG[1].tl.T == pinfo_e.tl.T == V * PK.S
+        assert ES.Verify(PK, 1, altSIG, M)
+
+
+def test_pipelined_evolve_random():
+    """ Using the global random generator while the next epoch is prepared does not change what AltSign re-derives """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, 3, V)
+        _, SK = ES.Evolve(SK, pipelined=True)
+        while not SK.next.done():
+            seed(getrandbits(64))
+        pinfo_e, SK = ES.Evolve(SK, pipelined=True)
+
+        _, pinfo_alt = ES.AltSign(PK, pinfo_e, 2, M, use_tl=True)
+        assert (pinfo_alt.PK_dynamic, pinfo_alt.tl.N) == (pinfo_e.PK_dynamic, pinfo_e.tl.N)
+
+
+def test_pipelined_evolve_failure(monkeypatch):
+    """ A failed background preparation leaves the states as they were, so the epoch is prepared again """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    calls: [int] = []
+
+    def generate_failing(*args):
+        calls.append(len(calls))
+        if len(calls) == 2:
+            raise Exception("Failed preparation")
+        return generate(*args)
+
+    monkeypatch.setattr(ESModule, 'generate', generate_failing)
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, 3, V)
+        _, SK = ES.Evolve(SK, pipelined=True)
+        assert SK.next.exception() is not None
+
+        for e in range(2, 4):
+            pinfo_e, SK = ES.Evolve(SK, pipelined=True)
+            assert pinfo_e.e == e
+            assert ES.Verify(PK, e, ES.Sign(SK, M), M)
@@ -0,0 +1,200 @@
+from hashlib import sha256
+from pickle import dumps, loads
+
+from src.schemes.ES.XMSStree.DataStructure import BDSState, NodeStore
+from src.schemes.ES.XMSStree.XMSS import *
+from src.schemes.ES.XMSStree.XMSSMT import XMSSMT_keyGen, XMSSMT_sign, XMSSMT_verify
+from src.schemes.ES.XMSStree.utils import Raw
+
+n, w, h, hasher = 32, 16, 4, sha256
+""" Small XMSS tree for testing """
+LENGTH: int = 35
+""" Number of WOTS chains """
+
+
+def test_traversal_ascending():
+    """ Traversal gives the same authentication paths as building them from scratch for ascending indices """
+    SK, _ = XMSS_keyGen(n, w, h, hasher, traversal=1)
+
+    for i in range(2 ** h):
+        assert bdsAuth(SK, i, ADRS(), w, LENGTH, h, hasher) == buildAuth(SK, i, ADRS(), w, LENGTH, h, hasher)
+
+
+def test_traversal_descending():
+    """ Traversal gives the same authentication paths as building them from scratch for descending indices """
+    SK, _ = XMSS_keyGen(n, w, h, hasher)
+    SK.bds = BDSState(h, -1)
+
+    for i in reversed(range(2 ** h - 3)):
+        assert bdsAuth(SK, i, ADRS(), w, LENGTH, h, hasher) == buildAuth(SK, i, ADRS(), w, LENGTH, h, hasher)
+
+
+def test_traversal_signatures():
+    """ Signatures created with the traversal are valid, also when a key signs out of order """
+    SK, PK = XMSS_keyGen(n, w, h, hasher, traversal=1)
+    M: bytes = hasher(b'hello').digest()
+
+    for i in [0, 1, 2, 7, 3]:
+        SK.idx = i
+        SIG = XMSS_sign(M, SK, w, ADRS(), h, hasher)
+        assert XMSS_verify(SIG, M, PK, w, PK.SEED, h, hasher)
+
+
+def test_node_store():
+    """ The node store gives the same authentication paths as building them from scratch """
+    SK, PK = XMSS_keyGen(n, w, h, hasher, store=NodeStore(h))
+
+    assert SK.nodes[(h, 0)] == PK.root_value
+    for i in range(2 ** h):
+        assert [SK.nodes[(j, (i >> j) ^ 1)] for j in range(h)] == buildAuth(SK, i, ADRS(), w, LENGTH, h, hasher)
+
+
+def test_node_store_file(tmp_path):
+    """ The node store mapped to a file is loaded again without rebuilding the tree """
+    SK, PK = XMSS_keyGen(n, w, h, hasher, store=NodeStore(h, str(tmp_path / 'nodes')))
+    SK.nodes = NodeStore(h, str(tmp_path / 'nodes'))
+    M: bytes = hasher(b'hello').digest()
+
+    assert SK.nodes[(h, 0)] == PK.root_value
+    for i in [5, 0, 15]:
+        SK.idx = i
+        SIG = XMSS_sign(M, SK, w, ADRS(), h, hasher)
+        assert XMSS_verify(SIG, M, PK, w, PK.SEED, h, hasher)
+
+
+def test_node_store_file_mismatch(tmp_path):
+    """ An empty node store file or one of other parameters is not read and gets reallocated """
+    path: str = str(tmp_path / 'nodes')
+    open(path, 'wb').close()
+    store: NodeStore = NodeStore(h, path)
+    assert store.buffer is None
+
+    SK, PK = XMSS_keyGen(n, w, h, hasher, store=store)
+    assert NodeStore(h, path).n == len(PK.root_value)
+    assert NodeStore(h + 1, path).buffer is None
+    assert NodeStore(h, path, len(PK.root_value) // 2).buffer is None
+
+    SK, PK = XMSS_keyGen(n, w, h, Raw(hasher), store=NodeStore(h, path))
+    SK.nodes = NodeStore(h, path, len(PK.root_value))
+    assert SK.nodes[(h, 0)] == PK.root_value
+
+
+def test_chains():
+    """ Advancing all the chains at once gives the same values as applying F step by step """
+    SEED: str = generate_key(n // 2, hasher)
+    KEY, BM, _ = masks(SEED, hasher)
+    X: [bytearray] = WOTS_deriveSK(generate_key(n // 2, hasher), LENGTH, n // 2, ADRS(), hasher)
+    starts: [int] = [i % w for i in range(LENGTH)]
+    steps: [int] = [(w - 1 - i % w) // 2 for i in range(LENGTH)]
+
+    for x, i, s, y in zip(X, starts, steps, chains(X, starts, steps, SEED, ADRS(), w, hasher)):
+        for _ in range(s):
+            x = F(KEY, xor(x, BM), hasher)
+        assert y == x
+        assert chain(X[0], i, s, SEED, ADRS(), w, hasher) == chains([X[0]], [i], [s], SEED, ADRS(), w, hasher)[0]
+
+
+def test_binary_variant():
+    """ The binary-native variant signs and verifies with nodes of half the size """
+    raw: Raw = Raw(hasher)
+    SK, PK = XMSS_keyGen(n, w, h, raw, traversal=1)
+    M: bytes = hasher(b'hello').digest()
+
+    assert len(PK.root_value) == n // 2
+    for i in [0, 1, 9]:
+        SK.idx = i
+        SIG = XMSS_sign(M, SK, w, ADRS(), h, raw)
+        assert all(len(node) == n // 2 for node in SIG.sig.sig_ots + SIG.sig.auth)
+        assert XMSS_verify(SIG, M, PK, w, PK.SEED, h, raw)
+        assert not XMSS_verify(SIG, hasher(b'olleh').digest(), PK, w, PK.SEED, h, raw)
+
+
+def test_address_layout():
+    """ The address fields are written in place at their offsets in the 32 bytes """
+    address: ADRS = ADRS()
+    address.setLayerAddress(1)
+    address.setTreeAddress(2)
+    address.setType(2)
+    address.setTreeHeight(3)
+    address.setTreeIndex(4)
+    address.setKeyAndMask(5)
+
+    assert bytes(address.view) == bytes.fromhex('00000001' '0000000000000002' '00000002' '00000000' '00000003'
+                                                '00000004' '00000005')
+    assert (address.getTreeHeight(), address.getTreeIndex(), address.keyAndMask) == (3, 4, b'\x00\x00\x00\x05')
+
+    address.setType(0)
+    assert bytes(address.view[16:]) == bytes(16)
+
+
+def test_multi_tree():
+    """ Multi-tree signatures verify for indices under different subtrees, also when a key signs out of order """
+    for variant in [hasher, Raw(hasher)]:
+        SK, PK = XMSSMT_keyGen(n, w, 2 * h, 2, variant)
+        M: bytes = hasher(b'hello').digest()
+
+        for i in [255, 254, 17, 0, 16, 200]:
+            SK.idx = i
+            SIG = XMSSMT_sign(M, SK, w, ADRS(), 2 * h, variant)
+            assert XMSSMT_verify(SIG, M, PK, w, PK.SEED, 2 * h, variant)
+            assert not XMSSMT_verify(SIG, hasher(b'olleh').digest(), PK, w, PK.SEED, 2 * h, variant)
+
+
+def test_parallel_keygen():
+    """ Key generation in worker processes gives the same tree as the serial one """
+    for workers in [2, 3]:
+        SK, PK = XMSS_keyGen(n, w, h, hasher, traversal=-1, workers=workers)
+        M: bytes = hasher(b'hello').digest()
+
+        assert treeHash(SK, 0, h, ADRS(), w, LENGTH, hasher) == PK.root_value
+        for i in reversed(range(2 ** h - 4, 2 ** h)):
+            SK.idx = i
+            SIG = XMSS_sign(M, SK, w, ADRS(), h, hasher)
+            assert XMSS_verify(SIG, M, PK, w, PK.SEED, h, hasher)
+
+
+def test_derived_keys():
+    """ The WOTS secret keys are derived from the seeds, so a loaded key signs without storing them """
+    SK, PK = XMSS_keyGen(n, w, h, hasher, traversal=-1)
+    SK_loaded: XMSSPrivateKey = loads(dumps(SK))
+    M: bytes = hasher(b'hello').digest()
+
+    assert len(dumps(SK)) < 1024
+    assert wotsSK(SK, 3, LENGTH, hasher) == wotsSK(SK_loaded, 3, LENGTH, hasher) != wotsSK(SK, 4, LENGTH, hasher)
+    SK_loaded.idx = 3
+    assert XMSS_verify(XMSS_sign(M, SK_loaded, w, ADRS(), h, hasher), M, PK, w, PK.SEED, h, hasher)
+
+
+def test_signature_encoding():
+    """ Signatures are pickled as their compact encoding and still verify after loading """
+    M: bytes = hasher(b'hello').digest()
+
+    SK, PK = XMSS_keyGen(n, w, h, hasher)
+    SK.idx = 5
+    SIG = loads(dumps(XMSS_sign(M, SK, w, ADRS(), h, hasher)))
+    assert len(SIG.toBytes()) == SIG_HEADER.size + len(SIG.r) + (LENGTH + h) * n
+    assert XMSS_verify(SIG, M, PK, w, PK.SEED, h, hasher)
+
+    SK, PK = XMSSMT_keyGen(n, w, 2 * h, 2, hasher)
+    SK.idx = 100
+    SIG = loads(dumps(XMSSMT_sign(M, SK, w, ADRS(), 2 * h, hasher)))
+    assert len(SIG.toBytes()) == SIG_MT_HEADER.size + len(SIG.r) + 2 * (LENGTH + h) * n
+    assert XMSSMT_verify(SIG, M, PK, w, PK.SEED, 2 * h, hasher)
+
+
+def test_disclosure():
+    """ A disclosed key is recovered with the public key and signs as the original one """
+    M: bytes = hasher(b'hello').digest()
+
+    for variant in [hasher, Raw(hasher)]:
+        SK, PK = XMSS_keyGen(n, w, h, variant)
+        SK.idx = 7
+        SK_recovered: XMSSPrivateKey = XMSS_recover(XMSS_disclose(SK), PK)
+        assert len(XMSS_disclose(SK)) == DISCLOSURE.size + n
+        assert XMSS_sign(M, SK_recovered, w, ADRS(), h, variant).toBytes() == \
+            XMSS_sign(M, SK, w, ADRS(), h, variant).toBytes()
+
+    SK, PK = XMSSMT_keyGen(n, w, 2 * h, 2, hasher)
+    SK.idx = 100
+    SIG = XMSSMT_sign(M, XMSS_recover(XMSS_disclose(SK), PK), w, ADRS(), 2 * h, hasher)
+    assert XMSSMT_verify(SIG, M, PK, w, PK.SEED, 2 * h, hasher)
@@ -149,3 +149,21 @@ def test_siblings():
 
         for i in range(E - V):
             assert S1_past[i] == S2_past[i + V]
+
+
+def test_peek():
+    """ Peeking at the next value does not consume it, the pebbler gives the same values as without peeking """
+    for s in SEC:
+        n, w, length, h, hasher = XMSS_VARIANTS[s]
+        _, PK = XMSS_keyGen(n, w, h, hasher)
+
+        init_r: bytes = urandom(s // 8)
+        next_r: Callable = random_value_factory(PK, s)
+
+        S1: PebbleState = PebbleState((init_r, E), next_r, E, 0)
+        S2: PebbleState = PebbleState((init_r, E), next_r, E, 0)
+
+        for _ in range(E):
+            r1: bytes = S1.peek()
+            assert S1.peek() == r1
+            assert S1.perform_update() == r1 == S2.perform_update()
@@ -0,0 +1,82 @@
+from copy import copy
+
+from src.schemes.SignatureScheme import generate, sign
+from src.schemes.ES.EpochalSignatureScheme import EpochalSignatureScheme
+from src.schemes.ES.verifier import VerifierES
+
+SEC: int = [256]
+""" General security parameter """
+M: str = 'hello'
+""" Message to test with """
+E: int = 10
+""" Number of epochs """
+V: int = 5
+""" Number of epoch for which the signature is valid """
+
+
+def test_verifier_cache():
+    """ The static signature of an epoch info is verified once for all the signatures of the epoch """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        pinfo_e, SK = ES.Evolve(SK)
+        verifier: VerifierES = VerifierES(PK)
+
+        for m in ['hello', 'world', 'again']:
+            assert verifier.verify(1, ES.Sign(SK, m), m)
+        assert not verifier.verify(1, ES.Sign(SK, M), 'olleh')
+        assert not verifier.verify(1 + V, ES.Sign(SK, M), M)
+
+        assert (verifier.misses, verifier.hits) == (1, 3)
+
+
+def test_verifier_forged_pinfo():
+    """ An epoch info that fails the static verification is not remembered """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        pinfo_e, SK = ES.Evolve(SK)
+        _, SK_other = ES.Gen(s, 1, E, V)
+        _, SK_other = ES.Evolve(SK_other)
+        verifier: VerifierES = VerifierES(PK)
+
+        for _ in range(2):
+            assert not verifier.verify(1, ES.Sign(SK_other, M), M)
+        assert (verifier.misses, verifier.hits, len(verifier.verified)) == (2, 0, 0)
+
+
+
+def test_verifier_swapped_key():
+    """ A copy of a remembered epoch info with another dynamic key is verified again, even with the old encodings """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        pinfo_e, SK = ES.Evolve(SK)
+        verifier: VerifierES = VerifierES(PK)
+        assert verifier.verify(1, ES.Sign(SK, M), M)
+
+        forged = copy(pinfo_e)
+        forged._static_args, forged._dynamic_args = pinfo_e.static_args, pinfo_e.dynamic_args
+        forged._dynamic_prefix = pinfo_e.get_dynamic_prefix()
+        SK_forged, forged.PK_dynamic = generate(pinfo_e.PK_dynamic.size_in_bits())
+        assert not verifier.verify(1, (sign(SK_forged, forged.get_dynamic_args(M)), forged), M)
+        assert (verifier.misses, verifier.hits, len(verifier.verified)) == (2, 0, 1)
+
+
+def test_verifier_eviction():
+    """ The least recently used epoch info is forgotten when the verifier is full """
+    ES: EpochalSignatureScheme = EpochalSignatureScheme()
+    for s in SEC:
+        PK, SK = ES.Gen(s, 1, E, V)
+        verifier: VerifierES = VerifierES(PK, size=2)
+
+        SIGs = []
+        for e in range(1, 4):
+            pinfo_e, SK = ES.Evolve(SK)
+            SIGs.append(ES.Sign(SK, M))
+            assert verifier.verify(e, SIGs[-1], M)
+
+        assert list(verifier.verified.values()) == [2, 3]
+        assert verifier.verify(3, SIGs[0], M)
+        assert list(verifier.verified.values()) == [3, 1]
+        assert verifier.misses == 4
@@ -0,0 +1,62 @@
+from collections import OrderedDict  # Least recently used order
+from hashlib import sha512  # Hashing
+
+from src.schemes.ES.EpochalSignatureScheme import EpochalSignatureScheme
+from src.schemes.ES.models import PublicKeyES, Pinfo
+
+VERIFIED_SIZE: int = 1024
+""" Amount of statically verified epoch infos kept by a verifier """
+
+
+class VerifierES:
+    """
+    Verifies ES signatures under one public key. All the signatures of an epoch carry the same epoch info, so the ones
+    whose static signature is valid are remembered, keyed by the digest of their encoding, and the following signatures
+    of the epoch only need the dynamic check. The encoding is computed from the values the epoch info holds, never
+    taken from what it cached.
+    """
+
+    def __init__(self, PK: PublicKeyES, size: int = VERIFIED_SIZE):
+        """
+        :param PK: ES scheme public key
+        :param size: amount of epoch infos to remember, the least recently used one is forgotten first
+        """
+        self.PK: PublicKeyES = PK
+        self.size: int = size
+        self.verified: OrderedDict = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def verify(self, e_current: int, SIG: (int, Pinfo), m: str, check_expired: bool = True) -> bool:
+        """
+        Validates the static and the dynamic signatures, the static one only if the epoch info is not remembered
+
+        :param e_current: current epoch number
+        :param SIG: signature tuple
+        :param m: message to validate signature for
+        :param check_expired: check whether a signature is valid, even tho it is already expired (for testing purposes)
+
+        :return: whether the signature is valid
+        """
+        SIG_dynamic, pinfo_e = SIG
+
+        return EpochalSignatureScheme._verify_epoch(self.PK, e_current, pinfo_e.e, check_expired) and \
+            self.verify_static(pinfo_e) and \
+            EpochalSignatureScheme._verify_dynamic(pinfo_e, SIG_dynamic, m)
+
+    def verify_static(self, pinfo_e: Pinfo) -> bool:
+        """ Validates the static signature of the epoch info, unless it already passed """
+        key: bytes = sha512(pinfo_e.encode_dynamic()).digest()
+        if key in self.verified:
+            self.verified.move_to_end(key)
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        if not EpochalSignatureScheme._verify_static(self.PK, pinfo_e):
+            return False
+
+        self.verified[key] = pinfo_e.e
+        if len(self.verified) > self.size:
+            self.verified.popitem(last=False)
+        return True
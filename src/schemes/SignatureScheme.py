@@ -1,18 +1,20 @@
-from libnum import randint_bits  # Random bit stream
-from random import seed  # Set randomness seed value
+from random import Random  # Private randomness of the seeded keys
 from sys import byteorder  # Little / Big Endian
 
-from Crypto.PublicKey.RSA import RsaKey, generate as generateRSA
+from Crypto.PublicKey.RSA import RsaKey, generate as generateRSA, import_key
 from Crypto.Hash.SHA512 import SHA512Hash, new as newSHA512
 from Crypto.Signature import PKCS1_v1_5
 
 
 def generate(SEC: int, r: bytes = b'') -> (RsaKey, RsaKey):
-    """ Generates an RSA key pair from a seed or randomly """
+    """ Generates an RSA key pair from a seed or randomly, the seeded bytes come from a private generator, so the key
+    does not depend on other threads using the global one """
     if r:
-        seed(r)
-        SK: RsaKey = generateRSA(SEC, randfunc=lambda x: randint_bits(x * 8).to_bytes(x, byteorder=byteorder))
-        seed()
+        rng: Random = Random(r)
+        # Same bits as libnum.randint_bits, the highest one is set
+        SK: RsaKey = generateRSA(
+            SEC, randfunc=lambda x: (rng.getrandbits(x * 8) | 1 << (x * 8 - 1)).to_bytes(x, byteorder=byteorder)
+        )
     else:
         SK: RsaKey = generateRSA(SEC)
 
@@ -21,19 +23,30 @@ def generate(SEC: int, r: bytes = b'') -> (RsaKey, RsaKey):
     return SK, PK
 
 
-def sign(SK: RsaKey, m: bytes) -> bytes:
-    """ Create a signature for a message m using the RSA private key """
-    hasher: SHA512Hash = newSHA512()
+def sign(SK: RsaKey, m: bytes, prefix: SHA512Hash = None) -> bytes:
+    """ Create a signature for a message m, optionally preceded by the bytes already hashed in prefix, using the RSA
+    private key """
+    hasher: SHA512Hash = prefix if prefix is not None else newSHA512()
     hasher.update(m)
     signer: PKCS1_v1_5 = PKCS1_v1_5.new(SK)
 
     return signer.sign(hasher)
 
 
-def verify(PK: RsaKey, m: bytes, SIG: bytes) -> bool:
-    """ Verify a signature for a message m using the RSA public key """
-    hasher: SHA512Hash = newSHA512()
+def verify(PK: RsaKey, m: bytes, SIG: bytes, prefix: SHA512Hash = None) -> bool:
+    """ Verify a signature for a message m, optionally preceded by the bytes already hashed in prefix, using the RSA
+    public key """
+    hasher: SHA512Hash = prefix if prefix is not None else newSHA512()
     hasher.update(m)
     verifier: PKCS1_v1_5 = PKCS1_v1_5.new(PK)
 
     return verifier.verify(hasher, SIG)
+
+
+def verify_many(PK: bytes, prefix: bytes, items: [(bytes, bytes)]) -> [bool]:
+    """ Verify signatures of messages that all follow the same prefix using the exported RSA public key, so that the
+    verification can run in a worker process """
+    key: RsaKey = import_key(PK)
+    hasher: SHA512Hash = newSHA512(prefix)
+
+    return [verify(key, m, SIG, hasher.copy()) for m, SIG in items]
@@ -2,15 +2,13 @@ from charm.core.engine.util import objectToBytes, bytesToObject  # Encode the li
 
 from src.schemes.DeniableSignatureScheme import DeniableSignatureScheme
 from src.TLP import *
+from src.TLP.calibration import squares_per_second, S_DEFAULT as S_TLP
 
 from .timestamp import FormatTimestamp, Init
 from .schemes.FunctionalSignatureScheme import FunctionalSignatureScheme
 from .models.SignatureTDS import SignatureTDS
 from .models.KeyTDS import KeyTDS
 
-S_TLP: int = 100_000
-""" Number of squares per second """
-
 
 class TimeDeniableSignatureScheme(DeniableSignatureScheme):
     """ The TDS scheme is used to create signatures that expire after the given time period """
@@ -21,7 +19,9 @@ class TimeDeniableSignatureScheme(DeniableSignatureScheme):
     def __init__(self):
         self.FS = FunctionalSignatureScheme()
 
-    def Gen(self, SEC: int, T: int, pair: str, N: int = 2, MAX: int = 65_535) -> (KeyTDS, KeyTDS):
+    def Gen(
+            self, SEC: int, T: int, pair: str, N: int = 2, MAX: int = 65_535, reuse_modulus: bool = False
+    ) -> (KeyTDS, KeyTDS):
         """
         Generates the master signing key and the master verification key pair (VK, SK) from the underlying FS scheme
 
@@ -30,13 +30,16 @@ class TimeDeniableSignatureScheme(DeniableSignatureScheme):
         :param pair: ID of the pairing group
         :param N: timestamp base (N = 2 -> binary, N = 10 -> deci, N = 16 -> hexa)
         :param MAX: the timestamp limit
+        :param reuse_modulus: lock all the puzzles under one modulus kept in SK, signing gets faster, but the
+            signatures then share the modulus, which sets them apart from the forged ones
 
         :return: key pair (PK, SK)
         """
         Init(N, MAX)  # Make sure all the timestamps share the same length
         MVK, MSK = self.FS.Setup(pair)
+        ctx: PuzzleContext = PuzzleContext.new(SEC, squares_per_second(SEC, S_TLP)) if reuse_modulus else None
 
-        return KeyTDS(MVK, T, SEC), KeyTDS(MSK, T, SEC)
+        return KeyTDS(MVK, T, SEC), KeyTDS(MSK, T, SEC, ctx)
 
     def Sign(self, SK: KeyTDS, m: str, t: int) -> SignatureTDS:
         """
@@ -56,7 +59,7 @@ class TimeDeniableSignatureScheme(DeniableSignatureScheme):
 
         # Encode the list of keys for t to bytes and initialize time-lock puzzle
         M: bytes = objectToBytes(SK_t, self.FS.HIBE.group)
-        C: TimeLockPuzzle = GenTLP(SEC, M, T, S_TLP)
+        C: TimeLockPuzzle = SK.ctx.lock(M, T) if SK.ctx else GenTLP(SEC, M, T, squares_per_second(SEC, S_TLP))
 
         return SignatureTDS(C, I, S)
 
@@ -86,7 +89,7 @@ class TimeDeniableSignatureScheme(DeniableSignatureScheme):
 
         # Encode the list of keys for t to bytes and initialize time-lock puzzle
         M: bytes = objectToBytes(SK_t, self.FS.HIBE.group)
-        C: TimeLockPuzzle = GenTLP(SEC, M, T, S_TLP)
+        C: TimeLockPuzzle = GenTLP(SEC, M, T, squares_per_second(SEC, S_TLP))
 
         return SignatureTDS(C, I, S)
 
@@ -2,6 +2,8 @@ from dataclasses import dataclass
 
 from charm.toolbox.pairinggroup import pc_element
 
+from src.TLP.TimeLockPuzzle import PuzzleContext
+
 
 @dataclass(frozen=True)
 class KeyTDS:
@@ -12,6 +14,8 @@ class KeyTDS:
     """ Timestamp, represents the maximum supported time """
     SEC: int
     """ Security parameter """
+    ctx: PuzzleContext = None
+    """ Time-lock puzzle context to lock all the puzzles under one modulus, only the signing key may hold it """
 
     @property
     def params(self):
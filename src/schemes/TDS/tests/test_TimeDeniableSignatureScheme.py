@@ -63,3 +63,15 @@ def test_forge_base():
         for t_forge in range(T + 1):
             SIGAlt = TDS.AltSign(VK, V, m_forge, t_forge)
             assert TDS.Verify(VK, SIGAlt, m_forge, t_forge)
+
+
+def test_sign_reuse_modulus():
+    """ TDS signatures locked under the signing key context share the modulus and can be forged """
+    VK, SK = TDS.Gen(SEC, T_TLP, pair, reuse_modulus=True)
+
+    SIG = TDS.Sign(SK, m, T)
+    assert SIG.C.N == SK.ctx.N
+    assert TDS.Verify(VK, SIG, m, T)
+
+    SIGAlt = TDS.AltSign(VK, (m, T, SIG), m_forge, T)
+    assert TDS.Verify(VK, SIGAlt, m_forge, T)